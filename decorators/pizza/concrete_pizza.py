@@ -1,6 +1,13 @@
-# from pizza.pizza import Pizza
+from decorators.pizza.pizza import Pizza
 
-# class GreekPizza(Pizza):
-#     def __init__(self):
 
-        
\ No newline at end of file
+class GreekPizza(Pizza):
+    def __init__(self, price=120):
+        self.price = price
+
+    def get_price(self):
+        return self.price
+
+    @property
+    def description(self) -> str:
+        return "Greek pizza"
@@ -1,15 +1,50 @@
-from pizza.pizza import Pizza
-from abc import abstractmethod
+from itertools import islice
+
+from decorators.pizza.pizza import Pizza
 
 
 class PizzaDecorator(Pizza):
     def __init__(self, pizza: Pizza):
         self.pizza = pizza
+        # Toppings stacked one on another share one list of (base, toppings);
+        # each keeps how many of them belong to its own pizza
+        if not isinstance(pizza, PizzaDecorator):
+            self._stack = (pizza, [])
+        elif pizza._depth == len(pizza._stack[1]):
+            self._stack = pizza._stack
+        else:
+            # Another topping already went on ``pizza``: branch off a copy
+            base, toppings = pizza._stack
+            self._stack = (base, toppings[:pizza._depth])
+        self._stack[1].append(self)
+        self._depth = len(self._stack[1])
+
+    def unwrap(self):
+        """Return the base pizza and the toppings on it, innermost first."""
+        base, toppings = self._stack
+        return base, toppings[:self._depth]
+
+    def _toppings(self):
+        toppings = self._stack[1]
+        return toppings if len(toppings) == self._depth else islice(toppings, self._depth)
 
-    @abstractmethod
     def get_price(self):
-        pass
+        # Loop over the flattened toppings so deep stacks don't recurse per layer
+        price = self._stack[0].get_price()
+        for topping in self._toppings():
+            price = topping.add_price(price)
+        return price
+
+    def add_price(self, price):
+        """Add only this topping's price."""
+        return price
+
+    @property
+    def label(self) -> str:
+        """This topping's own part of the description."""
+        return ""
 
     @property
     def description(self) -> str:
-        return self.pizza.description
+        labels = [topping.label for topping in self._toppings() if topping.label]
+        return ", ".join([self._stack[0].description] + labels)
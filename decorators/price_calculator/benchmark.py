@@ -0,0 +1,203 @@
+"""Benchmark the three implementations of the pricing rules.
+
+Compares calculate_price in badApproach.py, the classes in correctApproach.py
+and the decorator package (recursive, compiled, integer cents and batch).
+
+Usage:
+    python3 -m decorators.price_calculator.benchmark --output bench.json
+    python3 -m decorators.price_calculator.benchmark --baseline bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from decorators.price_calculator import badApproach, correctApproach
+from decorators.price_calculator.prices import BasePrice
+from decorators.price_calculator.price_calculator_decorator_impl import SeasonalDiscount, PromoCodeDiscount, LoyaltyDiscount, BulkDiscount, TaxCalculator
+
+
+DEPTHS = (1, 10, 100, 1000)
+
+
+def build_functions():
+    """Return single-price functions for the chain used in main.decorator()."""
+    correct = correctApproach.TaxCalculator(
+        correctApproach.BulkDiscount(
+            correctApproach.LoyaltyDiscount(
+                correctApproach.PromoCodeDiscount(
+                    correctApproach.SeasonalDiscount(correctApproach.BasePrice())
+                ),
+                loyalty_level=2,
+            ),
+            quantity=15,
+        )
+    )
+    chain = TaxCalculator(
+        BulkDiscount(
+            LoyaltyDiscount(
+                PromoCodeDiscount(SeasonalDiscount(BasePrice()), code="SAVE5"),
+                loyalty_level=2,
+            ),
+            quantity=15,
+        )
+    )
+
+    def bad(price):
+        return badApproach.calculate_price(price, seasonal=True, promo_code="SAVE5", loyalty="silver", quantity=15)
+
+    functions = {
+        "badApproach": bad,
+        "correctApproach": correct.calculate,
+        "decorators": chain.calculate,
+        "decorators.compiled": chain.compile(),
+        "decorators.cents": lambda price: chain.calculate_cents(int(price * 100)),
+    }
+    return functions, chain
+
+
+def per_call_seconds(function, argument, number, repeat):
+    """Best time for a single call out of ``repeat`` runs of ``number`` calls."""
+    timer = timeit.Timer(lambda: function(argument))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def peak_bytes_per_call(function, argument, calls=100):
+    """Average extra memory held at the peak of a single call."""
+    function(argument)
+    tracemalloc.start()
+    total = 0
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            function(argument)
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+    return total / calls
+
+
+def bench_latency(functions, number, repeat):
+    return {
+        name: per_call_seconds(function, 100.0, number, repeat) * 1e9
+        for name, function in functions.items()
+    }
+
+
+def bench_throughput(functions, chain, batch_size, repeat):
+    """Prices per second when repricing a whole batch."""
+    rng = random.Random(42)
+    prices = [round(rng.uniform(0, 500), 2) for _ in range(batch_size)]
+    results = {}
+    for name, function in functions.items():
+        seconds = min(timeit.repeat(lambda: [function(price) for price in prices], number=1, repeat=repeat))
+        results[name] = batch_size / seconds
+    array = np.array(prices)
+    seconds = min(timeit.repeat(lambda: chain.calculate_many(array), number=1, repeat=repeat))
+    results["decorators.calculate_many"] = batch_size / seconds
+    return results
+
+
+def bench_depth(number, repeat):
+    """Nanoseconds per call for chains of 1 to 1000 seasonal discounts."""
+    results = {}
+    for depth in DEPTHS:
+        correct = correctApproach.BasePrice()
+        chain = BasePrice()
+        for _ in range(depth):
+            correct = correctApproach.SeasonalDiscount(correct, discount_percent=0.01)
+            chain = SeasonalDiscount(chain, discount_percent=0.01)
+
+        functions = {
+            "correctApproach": correct.calculate,
+            "decorators": chain.calculate,
+            "decorators.compiled": chain.compile(),
+        }
+        results[str(depth)] = {}
+        for name, function in functions.items():
+            try:
+                results[str(depth)][name] = per_call_seconds(function, 100.0, number, repeat) * 1e9
+            except RecursionError:
+                results[str(depth)][name] = None
+    return results
+
+
+def bench_memory(functions):
+    return {name: peak_bytes_per_call(function, 100.0) for name, function in functions.items()}
+
+
+def run(number=20000, repeat=5, batch_size=100000):
+    functions, chain = build_functions()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "latency_ns": bench_latency(functions, number, repeat),
+        "throughput_per_s": bench_throughput(functions, chain, batch_size, repeat),
+        "depth_ns": bench_depth(max(number // 100, 10), repeat),
+        "peak_bytes_per_call": bench_memory(functions),
+    }
+
+
+def flatten(results, prefix=""):
+    """Flatten nested result sections into {"section.name": value}."""
+    flat = {}
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline):
+    """Return lines comparing each metric against a stored baseline."""
+    current, previous = flatten(results), flatten(baseline)
+    lines = []
+    for name, value in current.items():
+        old = previous.get(name)
+        if value is None or not old:
+            lines.append(f"{name:<55} {value!s:>14}   (no baseline)")
+            continue
+        lines.append(f"{name:<55} {value:>14.1f}   x{value / old:.2f} vs baseline")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pricing implementations.")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best one is kept")
+    parser.add_argument("--batch-size", type=int, default=100000, help="prices per throughput batch")
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.repeat, args.batch_size)
+
+    if args.output:
+        with open(args.output, "w") as target:
+            json.dump(results, target, indent=2)
+    if args.baseline:
+        with open(args.baseline) as source:
+            print("\n".join(compare(results, json.load(source))))
+    if not args.output and not args.baseline:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
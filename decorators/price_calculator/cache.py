@@ -0,0 +1,91 @@
+from collections import OrderedDict, namedtuple
+from typing import Optional
+
+import numpy as np
+
+from decorators.price_calculator.price_calculator import PriceCalculator
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PriceCache:
+    """Bounded LRU store of calculated prices keyed by (fingerprint, price)."""
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of prices kept before evicting the least
+                recently used one
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def get_or_calculate(self, calculator: PriceCalculator, fingerprint, price: float) -> float:
+        """Return the cached price for this chain, calculating it on a miss."""
+        key = (fingerprint, price)
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = calculator.calculate(price)
+            self._results[key] = result
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+            return result
+
+        self.hits += 1
+        self._results.move_to_end(key)
+        return result
+
+    def info(self) -> CacheInfo:
+        """Return hit/miss counters and the current size."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+
+    def clear(self) -> None:
+        """Drop all cached prices and reset the counters."""
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class CachedPrice(PriceCalculator):
+    """Memoizes the results of a wrapped chain in a (possibly shared) PriceCache."""
+
+    def __init__(self, wrapped: PriceCalculator, cache: Optional[PriceCache] = None):
+        """
+        Initialize with the chain to memoize.
+
+        The chain's fingerprint is taken once here, so the chain must not be
+        modified after it is wrapped. Chains with the same fingerprint can
+        share a cache and reuse each other's results.
+
+        Args:
+            wrapped: The price calculator to memoize
+            cache: Cache to store results in (default: a new private cache)
+        """
+        self.wrapped = wrapped
+        self.cache = cache if cache is not None else PriceCache()
+        self._fingerprint = wrapped.fingerprint
+
+    def calculate(self, price: float) -> float:
+        """Return the wrapped calculation, served from the cache when possible."""
+        return self.cache.get_or_calculate(self.wrapped, self._fingerprint, price)
+
+    def calculate_many(self, prices) -> np.ndarray:
+        """Batches are already vectorized, so they bypass the cache."""
+        return self.wrapped.calculate_many(prices)
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
+    @property
+    def description(self) -> str:
+        return self.wrapped.description
@@ -0,0 +1,46 @@
+"""Fixed-scale integer arithmetic for pricing in cents.
+
+Amounts are carried between steps as integers in units of 1/AMOUNT_SCALE of
+a cent, and scaling steps use integer factors in parts per FACTOR_SCALE. A
+step multiplies and rounds half-even back to the amount scale, so integers
+never grow with the depth of a chain. The result is rounded half-even to
+whole cents once, at the end.
+"""
+from fractions import Fraction
+
+# Sub-cent units an amount is carried in between steps
+AMOUNT_SCALE = 10 ** 6
+
+# Factors are integers in parts per million, e.g. 8.25% tax is 1_082_500
+FACTOR_SCALE = 10 ** 6
+
+
+def exact(value) -> Fraction:
+    """Return the decimal value a number was written as, e.g. 8.25 -> 33/4."""
+    return Fraction(str(value))
+
+
+def round_half_even(numerator: int, denominator: int) -> int:
+    """Round numerator / denominator to the nearest integer, ties to even."""
+    quotient, remainder = divmod(numerator, denominator)
+    doubled = 2 * remainder
+    if doubled > denominator or (doubled == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def to_cents(amount) -> int:
+    """Convert an amount in major units to integer cents, rounding half-even."""
+    value = exact(amount) * 100
+    return round_half_even(value.numerator, value.denominator)
+
+
+def to_factor(multiplier) -> int:
+    """Convert a multiplier such as 1.0825 to parts per FACTOR_SCALE, rounding half-even."""
+    value = Fraction(multiplier) * FACTOR_SCALE
+    return round_half_even(value.numerator, value.denominator)
+
+
+def scale(amount: int, factor: int) -> int:
+    """Multiply a scaled amount by a fixed-scale factor, rounding half-even."""
+    return round_half_even(amount * factor, FACTOR_SCALE)
@@ -0,0 +1,72 @@
+from typing import Dict, Tuple, Type
+
+from decorators.price_calculator.price_calculator import PriceCalculator
+from decorators.price_calculator.price_calculator_decorator_impl import (
+    SeasonalDiscount,
+    PromoCodeDiscount,
+    LoyaltyDiscount,
+    BulkDiscount,
+    TaxCalculator,
+)
+from decorators.price_calculator.prices import BasePrice
+
+
+# Calculator classes a fingerprint can be rebuilt from, by class name
+CALCULATORS: Dict[str, Type[PriceCalculator]] = {
+    cls.__name__: cls
+    for cls in (
+        BasePrice,
+        SeasonalDiscount,
+        PromoCodeDiscount,
+        LoyaltyDiscount,
+        BulkDiscount,
+        TaxCalculator,
+    )
+}
+
+
+def register_calculator(cls: Type[PriceCalculator]) -> Type[PriceCalculator]:
+    """Make a custom calculator class buildable from fingerprints."""
+    CALCULATORS[cls.__name__] = cls
+    return cls
+
+
+def build_chain(fingerprint: Tuple) -> PriceCalculator:
+    """
+    Rebuild a chain from its fingerprint.
+
+    Each step's parameters are passed positionally after the wrapped
+    component, so a fingerprint doubles as a serializable chain spec.
+
+    Args:
+        fingerprint: ((class name, parameters), ...) ordered innermost first
+    """
+    (root_name, root_parameters), *steps = fingerprint
+    chain = CALCULATORS[root_name](*root_parameters)
+    for name, parameters in steps:
+        chain = CALCULATORS[name](chain, *parameters)
+    return chain
+
+
+class ChainRegistry:
+    """Flyweight factory handing out one shared instance per distinct chain."""
+
+    def __init__(self):
+        self._chains: Dict[Tuple, PriceCalculator] = {}
+
+    def get(self, fingerprint: Tuple) -> PriceCalculator:
+        """Return the shared chain for a fingerprint, building it on first use."""
+        chain = self._chains.get(fingerprint)
+        if chain is None:
+            chain = self._chains[fingerprint] = build_chain(fingerprint)
+        return chain
+
+    def intern(self, chain: PriceCalculator) -> PriceCalculator:
+        """Return the shared instance structurally identical to ``chain``."""
+        return self._chains.setdefault(chain.fingerprint, chain)
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def __contains__(self, chain: PriceCalculator) -> bool:
+        return chain.fingerprint in self._chains
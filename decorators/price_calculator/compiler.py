@@ -0,0 +1,54 @@
+from typing import Callable
+
+from decorators.price_calculator.price_calculator import PriceCalculator
+from decorators.price_calculator.price_calculator_decorators import unwrap
+from decorators.price_calculator.price_calculator_decorator_impl import PromoCodeDiscount
+from decorators.price_calculator.prices import BasePrice
+
+
+def compile_chain(calculator: PriceCalculator) -> Callable[[float], float]:
+    """
+    Flatten a decorator chain into a single pricing function.
+
+    Multiplicative steps (seasonal, loyalty, bulk, tax) become inline
+    multiplications by their precomputed factor, promo code discounts become
+    an inline branch and any other decorator is called through its ``apply``
+    step. Steps run in the same order as ``calculator.calculate``, so the
+    result is identical to the last bit.
+
+    Args:
+        calculator: The outermost component of the chain
+
+    Returns:
+        A function taking a price and returning the calculated price
+    """
+    root, layers = unwrap(calculator)
+    namespace = {}
+    lines = ["def kernel(price):"]
+
+    # Subclasses may override calculate(), so only the plain root is inlined
+    if type(root) is BasePrice:
+        lines.append("    if price < 0:")
+        lines.append("        raise ValueError('Price cannot be negative')")
+    else:
+        namespace["root"] = root.calculate
+        lines.append("    price = root(price)")
+
+    for index, layer in enumerate(layers):
+        if layer.factor is not None:
+            # Multiplying one step at a time keeps the rounding of calculate()
+            namespace[f"factor_{index}"] = layer.factor
+            lines.append(f"    price = price * factor_{index}")
+        elif type(layer) is PromoCodeDiscount:
+            namespace[f"minimum_{index}"] = layer.min_purchase
+            namespace[f"amount_{index}"] = layer.discount_amount
+            lines.append(f"    if price >= minimum_{index}:")
+            lines.append(f"        price = max(0, price - amount_{index})")
+        else:
+            namespace[f"step_{index}"] = layer.apply
+            lines.append(f"    price = step_{index}(price)")
+
+    lines.append("    return price")
+
+    exec("\n".join(lines), namespace)
+    return namespace["kernel"]
@@ -1,7 +1,48 @@
-from abc import ABC, abstractmethod
+from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+from typing import Callable, List, Tuple
 
-class PriceCalculator(ABC):
+import numpy as np
+
+from decorators.price_calculator.cents import AMOUNT_SCALE, round_half_even, to_cents
+
+
+# One entry of a price breakdown: the component, its input and output price,
+# and whether its condition held (a skipped promo or bulk step is not applied)
+PriceStep = namedtuple("PriceStep", ["calculator", "input", "output", "applied"])
+
+
+class FreezeAfterInit(ABCMeta):
+    """Metaclass that makes calculators immutable once constructed."""
+
+    def __call__(cls, *args, **kwargs):
+        instance = super().__call__(*args, **kwargs)
+        instance._freeze()
+        return instance
+
+
+class PriceCalculator(metaclass=FreezeAfterInit):
     """Abstract base class for price calculation operations."""
+
+    def _freeze(self):
+        """Finish construction; no attribute can be set afterwards."""
+        object.__setattr__(self, "_frozen", True)
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__delattr__(name)
+
+    def __getstate__(self):
+        # Compiled kernels are not picklable; workers rebuild them on demand
+        state = dict(self.__dict__)
+        state.pop("_kernel", None)
+        return state
     
     @abstractmethod
     def calculate(self, price: float) -> float:
@@ -13,4 +54,59 @@ class PriceCalculator(ABC):
         """Return a description of the price calculation."""
         return "Base Price"
 
+    @property
+    def parameters(self) -> Tuple:
+        """Return the parameters that affect this component's calculation."""
+        return ()
+
+    @property
+    def fingerprint(self) -> Tuple:
+        """Return a hashable key identifying the structure of the calculation."""
+        return ((type(self).__name__, self.parameters),)
+
+    def explain(self, price: float) -> List[PriceStep]:
+        """Calculate the price once, recording the result of every step."""
+        from decorators.price_calculator.price_calculator_decorators import unwrap
+
+        root, layers = unwrap(self)
+        result = root.calculate(price)
+        steps = [PriceStep(root, price, result, True)]
+        for layer in layers:
+            output = layer.apply(result)
+            steps.append(PriceStep(layer, result, output, layer.applies(result)))
+            result = output
+        return steps
+
+    def calculate_many(self, prices) -> np.ndarray:
+        """Calculate a whole array (or buffer) of prices at once."""
+        prices = np.asarray(prices, dtype=float)
+        return np.fromiter(
+            (self.calculate(price) for price in prices), dtype=float, count=len(prices)
+        )
+
+    def calculate_cents(self, cents: int) -> int:
+        """
+        Calculate a price given in integer cents, returning integer cents.
+
+        Steps work on integers in millionths of a cent, rounding half-even
+        after each one, and the result is rounded half-even to whole cents
+        once at the end, so results are reproducible across runs.
+        """
+        return round_half_even(self.scaled_cents(cents), AMOUNT_SCALE)
+
+    def scaled_cents(self, cents: int) -> int:
+        """Return the result in units of 1/AMOUNT_SCALE of a cent."""
+        return to_cents(self.calculate(cents / 100)) * AMOUNT_SCALE
+
+    def compile(self) -> Callable[[float], float]:
+        """Flatten this calculation into a single precomputed pricing function."""
+        from decorators.price_calculator.compiler import compile_chain
+
+        # Calculators are immutable, so the kernel is built once and reused
+        kernel = self.__dict__.get("_kernel")
+        if kernel is None:
+            kernel = compile_chain(self)
+            object.__setattr__(self, "_kernel", kernel)
+        return kernel
+
 
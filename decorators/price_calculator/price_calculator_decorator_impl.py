@@ -1,6 +1,9 @@
-from decorators.price_calculator import PriceCalculator
-from decorators.price_calculator_decorators import DiscountDecorator
-from typing import Optional
+from decorators.price_calculator.cents import AMOUNT_SCALE, exact, to_cents, to_factor
+from decorators.price_calculator.price_calculator import PriceCalculator
+from decorators.price_calculator.price_calculator_decorators import DiscountDecorator
+from typing import Optional, Tuple
+
+import numpy as np
 
 
 class SeasonalDiscount(DiscountDecorator):
@@ -18,16 +21,20 @@ class SeasonalDiscount(DiscountDecorator):
         if not 0 <= discount_percent <= 100:
             raise ValueError("Discount percentage must be between 0 and 100")
         self.discount_percent = discount_percent
+        self.factor = 1 - (discount_percent / 100)
+        self.scaled_factor = to_factor(1 - exact(discount_percent) / 100)
+
+    def apply(self, price: float) -> float:
+        """Apply seasonal discount to an already calculated price."""
+        return price * self.factor
 
-    def calculate(self, price: float) -> float:
-        """Apply seasonal discount after wrapped calculation."""
-        base_price = self.wrapped.calculate(price)
-        discount_factor = 1 - (self.discount_percent / 100)
-        return base_price * discount_factor
+    @property
+    def parameters(self) -> Tuple:
+        return (self.discount_percent,)
 
     @property
-    def description(self) -> str:
-        return f"{self.wrapped.description}, Seasonal {self.discount_percent}% Off"
+    def label(self) -> str:
+        return f"Seasonal {self.discount_percent}% Off"
 
 
 class PromoCodeDiscount(DiscountDecorator):
@@ -55,22 +62,43 @@ class PromoCodeDiscount(DiscountDecorator):
         self.discount_amount = discount_amount
         self.min_purchase = min_purchase
         self.code = code
+        # Discount amount and minimum purchase in sub-cent units
+        self._scaled_amount = to_cents(discount_amount) * AMOUNT_SCALE
+        self._scaled_minimum = to_cents(min_purchase) * AMOUNT_SCALE
 
-    def calculate(self, price: float) -> float:
-        """Apply flat discount after wrapped calculation."""
-        base_price = self.wrapped.calculate(price)
-
+    def apply(self, price: float) -> float:
+        """Apply flat discount to an already calculated price."""
         # Only apply discount if price meets minimum purchase requirement
-        if base_price >= self.min_purchase:
+        if price >= self.min_purchase:
             # Ensure price doesn't go below zero
-            return max(0, base_price - self.discount_amount)
-        return base_price
+            return max(0, price - self.discount_amount)
+        return price
+
+    def applies(self, price: float) -> bool:
+        """The promo only applies once the minimum purchase is met."""
+        return price >= self.min_purchase
+
+    def apply_many(self, prices: np.ndarray) -> np.ndarray:
+        """Apply flat discount to the prices that meet the minimum purchase."""
+        eligible = prices >= self.min_purchase
+        discounted = np.maximum(prices - self.discount_amount, 0)
+        return np.where(eligible, discounted, prices)
+
+    def apply_scaled(self, amount: int) -> int:
+        """Apply flat discount to an amount in sub-cent units."""
+        if amount >= self._scaled_minimum:
+            return max(0, amount - self._scaled_amount)
+        return amount
+
+    @property
+    def parameters(self) -> Tuple:
+        return (self.discount_amount, self.min_purchase, self.code)
 
     @property
-    def description(self) -> str:
+    def label(self) -> str:
         code_str = f" (Code: {self.code})" if self.code else ""
         min_str = f" (Min. ${self.min_purchase})" if self.min_purchase > 0 else ""
-        return f"{self.wrapped.description}, ${self.discount_amount} Off{code_str}{min_str}"
+        return f"${self.discount_amount} Off{code_str}{min_str}"
 
 
 class LoyaltyDiscount(DiscountDecorator):
@@ -91,16 +119,20 @@ class LoyaltyDiscount(DiscountDecorator):
 
         # Discount increases with loyalty level: 5%, 7.5%, 10%
         self.discount_percent = self.loyalty_level * 2.5 + 2.5
+        self.factor = 1 - (self.discount_percent / 100)
+        self.scaled_factor = to_factor(1 - exact(self.discount_percent) / 100)
 
-    def calculate(self, price: float) -> float:
-        """Apply loyalty discount after wrapped calculation."""
-        base_price = self.wrapped.calculate(price)
-        discount_factor = 1 - (self.discount_percent / 100)
-        return base_price * discount_factor
+    def apply(self, price: float) -> float:
+        """Apply loyalty discount to an already calculated price."""
+        return price * self.factor
 
     @property
-    def description(self) -> str:
-        return f"{self.wrapped.description}, Loyalty {self.discount_percent}% Off (Level {self.loyalty_level})"
+    def parameters(self) -> Tuple:
+        return (self.loyalty_level,)
+
+    @property
+    def label(self) -> str:
+        return f"Loyalty {self.discount_percent}% Off (Level {self.loyalty_level})"
 
 
 class BulkDiscount(DiscountDecorator):
@@ -133,24 +165,28 @@ class BulkDiscount(DiscountDecorator):
         self.quantity = quantity
         self.threshold = threshold
         self.discount_percent = discount_percent
+        # Apply bulk discount only if quantity meets threshold
+        self.factor = 1 - (discount_percent / 100) if quantity >= threshold else 1.0
+        self.scaled_factor = to_factor(
+            1 - exact(discount_percent) / 100 if quantity >= threshold else 1
+        )
 
-    def calculate(self, price: float) -> float:
+    def apply(self, price: float) -> float:
         """Apply bulk discount if quantity threshold is met."""
-        # First calculate through wrapped components
-        base_price = self.wrapped.calculate(price)
+        return price * self.factor
+
+    def applies(self, price: float) -> bool:
+        """The bulk discount only applies once the quantity threshold is met."""
+        return self.quantity >= self.threshold
 
-        # Apply bulk discount if quantity meets threshold
-        if self.quantity >= self.threshold:
-            discount_factor = 1 - (self.discount_percent / 100)
-            return base_price * discount_factor
-        return base_price
+    @property
+    def parameters(self) -> Tuple:
+        return (self.quantity, self.threshold, self.discount_percent)
 
     @property
-    def description(self) -> str:
+    def label(self) -> str:
         status = "Applied" if self.quantity >= self.threshold else "Not Applied"
-        return (
-            f"{self.wrapped.description}, Bulk {self.discount_percent}% Off ({status})"
-        )
+        return f"Bulk {self.discount_percent}% Off ({status})"
 
 
 class TaxCalculator(DiscountDecorator):
@@ -168,13 +204,17 @@ class TaxCalculator(DiscountDecorator):
         if tax_rate < 0:
             raise ValueError("Tax rate cannot be negative")
         self.tax_rate = tax_rate
+        self.factor = 1 + (tax_rate / 100)
+        self.scaled_factor = to_factor(1 + exact(tax_rate) / 100)
 
-    def calculate(self, price: float) -> float:
+    def apply(self, price: float) -> float:
         """Apply tax after all other calculations."""
-        base_price = self.wrapped.calculate(price)
-        tax_factor = 1 + (self.tax_rate / 100)
-        return base_price * tax_factor
+        return price * self.factor
+
+    @property
+    def parameters(self) -> Tuple:
+        return (self.tax_rate,)
 
     @property
-    def description(self) -> str:
-        return f"{self.wrapped.description}, {self.tax_rate}% Tax"
+    def label(self) -> str:
+        return f"{self.tax_rate}% Tax"
@@ -1,4 +1,35 @@
-from decorators.price_calculator import PriceCalculator
+import threading
+from itertools import islice
+from typing import Optional, Tuple
+
+import numpy as np
+
+from decorators.price_calculator.cents import AMOUNT_SCALE, FACTOR_SCALE, round_half_even, scale, to_cents
+from decorators.price_calculator.price_calculator import PriceCalculator
+
+
+# Serializes joining a pipeline, so two decorators never claim the same slot
+_PIPELINE_LOCK = threading.Lock()
+
+
+class _Pipeline:
+    """
+    Steps shared by every decorator of a chain built one on top of another.
+
+    Each decorator records how many of the layers are its own chain, so a
+    chain of n decorators holds one list of n layers rather than n copies
+    of its prefixes. ``operations`` holds each layer's float factor, or its
+    bound ``apply`` if it is not a pure scale.
+    """
+
+    __slots__ = ("root", "layers", "operations", "description")
+
+    def __init__(self, root, layers, operations):
+        self.root = root
+        self.layers = layers
+        self.operations = operations
+        # (depth, text) of the last description built from this pipeline
+        self.description = None
 
 
 class DiscountDecorator(PriceCalculator):
@@ -8,7 +39,172 @@ class DiscountDecorator(PriceCalculator):
         """Initialize with the component to wrap."""
         self.wrapped = wrapped
 
+    def _freeze(self):
+        # Join the wrapped chain's pipeline once fully constructed, when the
+        # step's factor is known
+        cls = type(self)
+        if cls.calculate is not DiscountDecorator.calculate:
+            # An overridden calculate() runs the wrapped chain itself, so its
+            # step can't be split out: it roots a pipeline of its own
+            self._pipeline = _Pipeline(self, [], [])
+            self._depth = 0
+            super()._freeze()
+            return
+        if cls.apply is DiscountDecorator.apply:
+            raise TypeError(f"Can't instantiate {cls.__name__} without calculate() or apply()")
+        wrapped = self.wrapped
+        operation = float(self.factor) if self.factor is not None else self.apply
+        with _PIPELINE_LOCK:
+            if not isinstance(wrapped, DiscountDecorator):
+                pipeline = _Pipeline(wrapped, [], [])
+            elif wrapped._depth == len(wrapped._pipeline.layers):
+                pipeline = wrapped._pipeline
+            else:
+                # Another chain already extends ``wrapped``: branch off a copy
+                inner = wrapped._pipeline
+                pipeline = _Pipeline(
+                    inner.root, inner.layers[:wrapped._depth], inner.operations[:wrapped._depth]
+                )
+            pipeline.layers.append(self)
+            pipeline.operations.append(operation)
+        self._pipeline = pipeline
+        self._depth = len(pipeline.layers)
+        super()._freeze()
+
+    def __reduce_ex__(self, protocol):
+        # Chains of registered classes pickle as their flat fingerprint, so
+        # neither the shared pipeline nor deep nesting ends up in the pickle
+        from decorators.price_calculator.chain_registry import CALCULATORS, build_chain
+
+        root, layers = self.steps
+        if all(CALCULATORS.get(type(step).__name__) is type(step) for step in (root, *layers)):
+            return build_chain, (self.fingerprint,)
+        return super().__reduce_ex__(protocol)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in ("_pipeline", "_depth", "_frozen"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        # Rejoin the wrapped chain's pipeline, as at construction
+        self.__dict__.update(state)
+        self._freeze()
+
+    def _slice(self, items):
+        # This chain's share of a pipeline list, without copying it
+        return items if len(items) == self._depth else islice(items, self._depth)
+
+    @property
+    def steps(self) -> Tuple[PriceCalculator, Tuple["DiscountDecorator", ...]]:
+        """Return the chain's root and its decorators innermost first."""
+        if not self._depth:
+            return self, ()
+        pipeline = self._pipeline
+        return pipeline.root, tuple(pipeline.layers[:self._depth])
+
+    def calculate(self, price: float) -> float:
+        """Calculate through the wrapped component, then apply each step in turn."""
+        pipeline = self._pipeline
+        price = pipeline.root.calculate(price)
+        for operation in self._slice(pipeline.operations):
+            if operation.__class__ is float:
+                price = price * operation
+            else:
+                price = operation(price)
+        return price
+
+    def apply(self, price: float) -> float:
+        """Apply only this decorator's step to an already calculated price."""
+        return price
+
+    def applies(self, price: float) -> bool:
+        """Return whether this step takes effect on an already calculated price."""
+        return True
+
+    def calculate_many(self, prices) -> np.ndarray:
+        """Calculate an array of prices through the wrapped component, then each step."""
+        if not self._depth:
+            return super().calculate_many(prices)
+        pipeline = self._pipeline
+        prices = pipeline.root.calculate_many(prices)
+        for layer in self._slice(pipeline.layers):
+            prices = layer.apply_many(prices)
+        return prices
+
+    def apply_many(self, prices: np.ndarray) -> np.ndarray:
+        """Apply only this decorator's step to an array of calculated prices."""
+        if self.factor is not None:
+            return prices * self.factor
+        return np.fromiter(
+            (self.apply(price) for price in prices), dtype=float, count=len(prices)
+        )
+
+    def scaled_cents(self, cents: int) -> int:
+        """Calculate in sub-cent integers through the wrapped component, then each step."""
+        if not self._depth:
+            return super().scaled_cents(cents)
+        pipeline = self._pipeline
+        amount = pipeline.root.scaled_cents(cents)
+        for layer in self._slice(pipeline.layers):
+            factor = layer.scaled_factor
+            if factor is None:
+                amount = layer.apply_scaled(amount)
+                continue
+            # scale() inlined, as it runs once per step
+            amount, remainder = divmod(amount * factor, FACTOR_SCALE)
+            if 2 * remainder > FACTOR_SCALE or (2 * remainder == FACTOR_SCALE and amount & 1):
+                amount += 1
+        return amount
+
+    def apply_scaled(self, amount: int) -> int:
+        """Apply only this step to an amount in sub-cent units."""
+        if self.scaled_factor is not None:
+            return scale(amount, self.scaled_factor)
+        # Steps without an integer form are applied in major units and rounded
+        price = round_half_even(amount, AMOUNT_SCALE) / 100
+        return to_cents(self.apply(price)) * AMOUNT_SCALE
+
+    # Multiplier this step applies, or None if it is not a pure scale;
+    # scaling steps set it once in __init__
+    factor: Optional[float] = None
+
+    # ``factor`` in parts per FACTOR_SCALE, or None if this step is not a pure scale
+    scaled_factor: Optional[int] = None
+
+    @property
+    def fingerprint(self) -> Tuple:
+        """Return the root's fingerprint extended with every step."""
+        if not self._depth:
+            return self.wrapped.fingerprint + ((type(self).__name__, self.parameters),)
+        pipeline = self._pipeline
+        return pipeline.root.fingerprint + tuple(
+            (type(layer).__name__, layer.parameters) for layer in self._slice(pipeline.layers)
+        )
+
+    @property
+    def label(self) -> str:
+        """Return this step's own part of the description."""
+        return ""
+
     @property
     def description(self) -> str:
-        """Return description of the wrapped component."""
-        return self.wrapped.description
+        """Return the description of the whole chain, reused until another prefix asks."""
+        if not self._depth:
+            return ", ".join(filter(None, [self.wrapped.description, self.label]))
+        pipeline = self._pipeline
+        cached = pipeline.description
+        if cached is not None and cached[0] == self._depth:
+            return cached[1]
+        labels = [layer.label for layer in self._slice(pipeline.layers) if layer.label]
+        description = ", ".join([pipeline.root.description] + labels)
+        pipeline.description = (self._depth, description)
+        return description
+
+
+def unwrap(calculator: PriceCalculator) -> Tuple[PriceCalculator, Tuple[DiscountDecorator, ...]]:
+    """Split a chain into its root component and its decorators, innermost first."""
+    if isinstance(calculator, DiscountDecorator):
+        return calculator.steps
+    return calculator, ()
@@ -1,15 +1,47 @@
-from decorators.price_calculator import PriceCalculator
+
+import numpy as np
+
+from decorators.price_calculator.cents import AMOUNT_SCALE
+from decorators.price_calculator.price_calculator import PriceCalculator
 
 # concrete 
 class BasePrice(PriceCalculator):
-    """Basic price with no modifications."""
+    """Basic price with no modifications, shared as a single instance."""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        # Subclasses may carry their own state, so only BasePrice is shared
+        if cls is not BasePrice:
+            return super(BasePrice, cls).__new__(cls)
+        if cls._instance is None:
+            cls._instance = super(BasePrice, cls).__new__(cls)
+        return cls._instance
     
     def calculate(self, price: float) -> float:
         """Return the original price without modifications."""
         if price < 0:
             raise ValueError("Price cannot be negative")
         return price
+
+    def calculate_many(self, prices) -> np.ndarray:
+        """Return the original prices, rejecting any negative entries at once."""
+        prices = np.asarray(prices, dtype=float)
+        negative = np.flatnonzero(prices < 0)
+        if negative.size:
+            shown = ", ".join(str(index) for index in negative[:10])
+            more = f" and {negative.size - 10} more" if negative.size > 10 else ""
+            raise ValueError(f"Price cannot be negative (indices: {shown}{more})")
+        return prices
     
+    def scaled_cents(self, cents: int) -> int:
+        """Return the original price, which must be whole cents, in sub-cent units."""
+        if not isinstance(cents, int):
+            raise TypeError("Price in cents must be an integer")
+        if cents < 0:
+            raise ValueError("Price cannot be negative")
+        return cents * AMOUNT_SCALE
+
     @property
     def description(self) -> str:
         return "Base Price"
@@ -1,12 +1,26 @@
+import pickle
 import unittest
-from price_calculator.price_calculator_decorator_impl import (
+from array import array
+
+import numpy as np
+
+from decorators.price_calculator.price_calculator_decorator_impl import (
     SeasonalDiscount,
     PromoCodeDiscount,
     LoyaltyDiscount,
     BulkDiscount,
     TaxCalculator,
 )
-from price_calculator.prices import BasePrice
+from decorators.price_calculator.price_calculator_decorators import DiscountDecorator
+from decorators.price_calculator.prices import BasePrice
+from decorators.pizza.concrete_pizza import GreekPizza
+from decorators.pizza.pizza_decorators_impl import (
+    PeperoniToppings,
+    ExtraCheeseToppings,
+    BaconToppings,
+)
+from decorators.price_calculator.cache import CachedPrice, PriceCache
+from decorators.price_calculator.chain_registry import ChainRegistry, build_chain
 
 
 class TestPriceCalculator(unittest.TestCase):
@@ -173,6 +187,287 @@ class TestPriceCalculator(unittest.TestCase):
         # Different order produces different result
         self.assertNotAlmostEqual(final.calculate(100), 72.34, places=2)
 
+    def test_compiled_chain(self):
+        """Test that a compiled chain matches the recursive calculation."""
+        base = BasePrice()
+        seasonal = SeasonalDiscount(base)
+        promo = PromoCodeDiscount(seasonal, discount_amount=10, min_purchase=50)
+        loyalty = LoyaltyDiscount(promo, loyalty_level=2)
+        bulk = BulkDiscount(loyalty, quantity=15)
+        final = TaxCalculator(bulk)
+        kernel = final.compile()
+
+        for price in (0, 0.5, 40, 55.55, 56, 100, 1000000):
+            self.assertEqual(kernel(price), final.calculate(price))
+
+        # Results match to the last bit, not just approximately
+        prices = np.random.default_rng(7).uniform(0, 500, 10000).tolist()
+        self.assertEqual([kernel(price) for price in prices], [final.calculate(price) for price in prices])
+
+        # Promo floor keeps the price at zero
+        kernel = PromoCodeDiscount(base, discount_amount=150).compile()
+        self.assertEqual(kernel(100), 0)
+
+        # Base price validation still applies
+        with self.assertRaises(ValueError):
+            final.compile()(-10)
+
+        self.assertEqual(base.compile()(100), 100)
+
+        # A subclassed root keeps its own calculate()
+        class Floor(BasePrice):
+            def calculate(self, price):
+                return max(10, super().calculate(price))
+
+        floored = SeasonalDiscount(Floor())
+        for price in (1, 10, 100):
+            self.assertEqual(floored.compile()(price), floored.calculate(price))
+        self.assertEqual(floored.compile()(1), 9)
+
+    def test_calculate_many(self):
+        """Test that batch pricing matches calculating one price at a time."""
+        final = TaxCalculator(
+            BulkDiscount(
+                LoyaltyDiscount(
+                    PromoCodeDiscount(
+                        SeasonalDiscount(self.base_price),
+                        discount_amount=10,
+                        min_purchase=50,
+                    ),
+                    loyalty_level=2,
+                ),
+                quantity=15,
+            )
+        )
+        prices = [0, 0.5, 40, 55.55, 56, 100, 1000000]
+
+        result = final.calculate_many(np.array(prices))
+        expected = [final.calculate(price) for price in prices]
+        np.testing.assert_allclose(result, expected)
+
+        # Plain buffers are accepted as well
+        result = final.calculate_many(array("d", prices))
+        np.testing.assert_allclose(result, expected)
+
+        # Promo floor keeps prices at zero
+        promo = PromoCodeDiscount(self.base_price, discount_amount=150)
+        np.testing.assert_array_equal(promo.calculate_many([100, 200]), [0, 50])
+
+        # All negative prices are reported together
+        with self.assertRaises(ValueError) as context:
+            final.calculate_many([10, -1, 20, -5])
+        self.assertIn("indices: 1, 3", str(context.exception))
+
+    def test_cached_price(self):
+        """Test memoizing chains through a shared LRU cache."""
+        cache = PriceCache(maxsize=2)
+        first = CachedPrice(SeasonalDiscount(BasePrice()), cache)
+        second = CachedPrice(SeasonalDiscount(BasePrice()), cache)
+        other = CachedPrice(SeasonalDiscount(BasePrice(), discount_percent=20), cache)
+
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.assertNotEqual(first.fingerprint, other.fingerprint)
+        self.assertEqual(first.description, "Base Price, Seasonal 10.0% Off")
+
+        self.assertEqual(first.calculate(100), 90)
+        self.assertEqual(second.calculate(100), 90)  # Identical chain hits
+        self.assertEqual(other.calculate(100), 80)  # Different chain misses
+        self.assertEqual(cache.info(), (1, 2, 2, 2))
+
+        # Least recently used entry is evicted
+        first.calculate(200)
+        self.assertEqual(cache.info().currsize, 2)
+        self.assertEqual(other.calculate(100), 80)
+        self.assertEqual(cache.info().misses, 3)
+        self.assertEqual(first.calculate(100), 90)
+        self.assertEqual(cache.info().misses, 4)
+
+        # Errors are not cached
+        with self.assertRaises(ValueError):
+            first.calculate(-10)
+
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 2, 0))
+
+        with self.assertRaises(ValueError):
+            PriceCache(maxsize=0)
+
+    def test_chain_registry(self):
+        """Test interning structurally identical chains."""
+        self.assertIs(BasePrice(), self.base_price)
+
+        registry = ChainRegistry()
+        first = registry.intern(LoyaltyDiscount(SeasonalDiscount(BasePrice()), 2))
+        second = registry.intern(LoyaltyDiscount(SeasonalDiscount(BasePrice()), 2))
+        other = registry.intern(LoyaltyDiscount(SeasonalDiscount(BasePrice()), 3))
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(registry), 2)
+        self.assertIs(registry.get(first.fingerprint), first)
+        self.assertIs(first.compile(), second.compile())
+
+        # Subclasses are not handed the shared BasePrice instance
+        class Floor(BasePrice):
+            def __init__(self, floor=0):
+                self.floor = floor
+
+            def calculate(self, price):
+                return max(self.floor, super().calculate(price))
+
+        floor = Floor(20)
+        self.assertIsInstance(floor, Floor)
+        self.assertIsNot(Floor(20), floor)
+        self.assertEqual(floor.calculate(10), 20)
+        self.assertIs(BasePrice(), self.base_price)
+
+        # Chains can be rebuilt from their fingerprint
+        promo = PromoCodeDiscount(self.base_price, 10, min_purchase=50, code="SAVE10")
+        rebuilt = registry.get(promo.fingerprint)
+        self.assertIsNot(rebuilt, promo)
+        self.assertEqual(rebuilt.description, promo.description)
+        self.assertEqual(build_chain(promo.fingerprint).calculate(100), 90)
+
+        # Chains survive pickling even after being compiled
+        copy = pickle.loads(pickle.dumps(first))
+        self.assertEqual(copy.fingerprint, first.fingerprint)
+        self.assertIs(copy.wrapped.wrapped, BasePrice())
+        self.assertEqual(copy.calculate(100), first.calculate(100))
+
+        # Calculators are frozen after construction
+        with self.assertRaises(AttributeError):
+            first.discount_percent = 50
+        with self.assertRaises(AttributeError):
+            first.wrapped = self.base_price
+
+    def test_calculate_cents(self):
+        """Test exact integer-cents pricing with a single half-even rounding."""
+        self.assertEqual(self.base_price.calculate_cents(10000), 10000)
+        with self.assertRaises(ValueError):
+            self.base_price.calculate_cents(-1)
+        with self.assertRaises(TypeError):
+            self.base_price.calculate_cents(10.5)
+
+        # Ties round to the even cent
+        tax = TaxCalculator(self.base_price, tax_rate=5)
+        self.assertEqual(tax.calculate_cents(50), 52)  # 52.5
+        self.assertEqual(tax.calculate_cents(70), 74)  # 73.5
+
+        # Intermediate steps keep millionths of a cent: 1.01 * 0.5 * 0.5 * 1.1 = 0.27775
+        chain = TaxCalculator(
+            SeasonalDiscount(SeasonalDiscount(self.base_price, 50), 50), tax_rate=10
+        )
+        self.assertEqual(chain.scaled_cents(101), 27775000)
+        self.assertEqual(chain.calculate_cents(101), 28)
+        self.assertEqual(chain.scaled_factor, 1100000)
+
+        final = TaxCalculator(
+            BulkDiscount(
+                LoyaltyDiscount(
+                    PromoCodeDiscount(SeasonalDiscount(self.base_price), min_purchase=50),
+                    loyalty_level=2,
+                ),
+                quantity=15,
+            )
+        )
+        self.assertEqual(final.calculate_cents(10000), 7234)
+        self.assertEqual(final.calculate_cents(5000), 3830)
+
+        # Promo minimum and floor are applied in exact cents
+        promo = PromoCodeDiscount(self.base_price, discount_amount=10, min_purchase=50)
+        self.assertEqual(promo.calculate_cents(4999), 4999)
+        self.assertEqual(promo.calculate_cents(5000), 4000)
+        self.assertEqual(PromoCodeDiscount(self.base_price, 150).calculate_cents(100), 0)
+
+    def test_explain(self):
+        """Test the per-step breakdown of a chain."""
+        seasonal = SeasonalDiscount(self.base_price)
+        promo = PromoCodeDiscount(seasonal, discount_amount=10, min_purchase=100)
+        bulk = BulkDiscount(promo, quantity=5)
+        final = TaxCalculator(bulk, tax_rate=10)
+
+        steps = final.explain(100)
+
+        self.assertEqual(
+            [step.calculator for step in steps],
+            [self.base_price, seasonal, promo, bulk, final],
+        )
+        self.assertEqual([step.applied for step in steps], [True, True, False, False, True])
+        self.assertEqual(steps[1].input, 100)
+        self.assertEqual(steps[1].output, 90)
+        self.assertEqual(steps[2].output, 90)  # Below promo minimum
+        self.assertAlmostEqual(steps[-1].output, final.calculate(100))
+
+        with self.assertRaises(ValueError):
+            final.explain(-1)
+
+        # Steps are applied by their own conditions, not by changing the price
+        steps = TaxCalculator(BulkDiscount(SeasonalDiscount(self.base_price, 0), quantity=20)).explain(0)
+        self.assertEqual([step.applied for step in steps], [True, True, True, True])
+        steps = PromoCodeDiscount(self.base_price, min_purchase=0).explain(0)
+        self.assertTrue(steps[1].applied)
+
+        # Descriptions are built once and reused
+        self.assertIs(final.description, final.description)
+
+    def test_deep_chain(self):
+        """Test chains far deeper than the recursion limit."""
+        chain = self.base_price
+        for _ in range(20000):
+            chain = SeasonalDiscount(chain, discount_percent=0.001)
+
+        expected = 100 * (1 - 0.001 / 100) ** 20000
+        self.assertAlmostEqual(chain.calculate(100), expected, places=6)
+        self.assertAlmostEqual(chain.calculate_many([100])[0], expected, places=6)
+        self.assertEqual(len(chain.explain(100)), 20001)
+        self.assertEqual(len(chain.fingerprint), 20001)
+        self.assertTrue(chain.description.endswith("Seasonal 0.001% Off"))
+
+        # Pickles hold only the chain's own steps, however deep or shared
+        first = chain.steps[1][0]
+        self.assertLess(len(pickle.dumps(first)), 200)
+        copy = pickle.loads(pickle.dumps(chain))
+        self.assertEqual(copy.fingerprint, chain.fingerprint)
+        self.assertEqual(copy.calculate(100), chain.calculate(100))
+
+        # Inner steps are reused when the chain keeps growing
+        taxed = TaxCalculator(chain)
+        self.assertIs(taxed.steps[1][-2], chain)
+        self.assertIs(taxed._pipeline, chain._pipeline)
+        self.assertAlmostEqual(taxed.calculate(100), expected * 1.0825, places=6)
+
+        # Branching off a prefix leaves the other chain untouched
+        seasonal = SeasonalDiscount(self.base_price)
+        taxed, promo = TaxCalculator(seasonal), PromoCodeDiscount(seasonal, 10)
+        self.assertAlmostEqual(taxed.calculate(100), 97.425)
+        self.assertEqual(promo.calculate(100), 80)
+        self.assertEqual(seasonal.calculate(100), 90)
+        self.assertEqual(promo.description, "Base Price, Seasonal 10.0% Off, $10 Off")
+
+    def test_custom_decorator(self):
+        """Test decorators that override calculate() inside a chain."""
+
+        class Plus1(DiscountDecorator):
+            def calculate(self, price):
+                return self.wrapped.calculate(price) + 1
+
+        chain = TaxCalculator(Plus1(SeasonalDiscount(self.base_price)), tax_rate=10)
+        expected = (100 * 0.9 + 1) * 1.1
+        self.assertAlmostEqual(chain.calculate(100), expected)
+        self.assertAlmostEqual(chain.calculate_many([100])[0], expected)
+        self.assertAlmostEqual(chain.compile()(100), expected)
+        self.assertAlmostEqual(chain.explain(100)[-1].output, expected)
+        self.assertEqual(chain.calculate_cents(10000), 10010)
+        self.assertEqual(chain.description, "Base Price, Seasonal 10.0% Off, 10% Tax")
+        self.assertEqual(len(chain.fingerprint), 4)
+
+        # A decorator without either method is rejected rather than a no-op
+        class Noop(DiscountDecorator):
+            pass
+
+        with self.assertRaises(TypeError):
+            Noop(self.base_price)
+
     def test_edge_cases(self):
         """Test edge cases for the price calculator."""
         # Test with zero price
@@ -191,5 +486,31 @@ class TestPriceCalculator(unittest.TestCase):
         self.assertEqual(bulk.calculate(large_price), large_price * 0.85)
 
 
+class TestPizzaDecorators(unittest.TestCase):
+
+    def test_toppings(self):
+        pizza = BaconToppings(ExtraCheeseToppings(PeperoniToppings(GreekPizza())))
+        self.assertEqual(pizza.get_price(), 120 + 90 + 72 + 30)
+        self.assertEqual(
+            pizza.description,
+            "Greek pizza, with Peperoni Toppings, with ExtraCheese Toppings, with Bacon Toppings",
+        )
+
+    def test_deep_toppings(self):
+        pizza = GreekPizza(price=0)
+        for _ in range(20000):
+            pizza = BaconToppings(pizza)
+        self.assertEqual(pizza.get_price(), 20000 * 30)
+        self.assertEqual(pizza.description.count("Bacon"), 20000)
+
+        # Toppings share one flattened list, and branching keeps both pizzas apart
+        base = PeperoniToppings(GreekPizza())
+        bacon, cheese = BaconToppings(base), ExtraCheeseToppings(base)
+        self.assertIs(bacon.unwrap()[1][0], base)
+        self.assertEqual(bacon.get_price(), 120 + 90 + 30)
+        self.assertEqual(cheese.get_price(), 120 + 90 + 72)
+        self.assertEqual(base.get_price(), 120 + 90)
+
+
 if __name__ == "__main__":
     unittest.main()
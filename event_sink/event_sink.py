@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# A structured event: what happened, a human readable template for it and
+# the values filling the template in
+Event = namedtuple("Event", ["timestamp", "name", "template", "data"])
+
+
+def format_event(event: Event) -> str:
+    return event.template.format(**event.data)
+
+
+# Sink Interface
+class EventSink(ABC):
+    @abstractmethod
+    def emit(self, name: str, template: str, **data) -> None:
+        """Record an event. Must be cheap enough to call from hot paths."""
+        pass
+
+    def flush(self) -> None:
+        """Push out any buffered events."""
+        pass
+
+    def close(self) -> None:
+        """Flush and release any resources held by the sink."""
+        self.flush()
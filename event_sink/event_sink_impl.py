@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import List
+
+from event_sink.event_sink import Event, EventSink, format_event
+
+
+# Discards every event
+class NullSink(EventSink):
+    def emit(self, name: str, template: str, **data) -> None:
+        pass
+
+
+# Prints each event's message as it happens, like the original print() calls
+class StdoutSink(EventSink):
+    def emit(self, name: str, template: str, **data) -> None:
+        print(template.format(**data))
+
+
+# Shared default for code that used to print directly
+STDOUT_SINK = StdoutSink()
+
+
+# Keeps only the most recent events in memory
+class RingBufferSink(EventSink):
+    def __init__(self, capacity: int = 10000):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self._events = deque(maxlen=capacity)
+
+    def emit(self, name: str, template: str, **data) -> None:
+        self._events.append(Event(time.time(), name, template, data))
+
+    def events(self) -> List[Event]:
+        return list(self._events)
+
+    def messages(self) -> List[str]:
+        return [format_event(event) for event in self._events]
+
+    def clear(self) -> None:
+        self._events.clear()
+
+
+# Buffers events and writes them as JSON lines from a background thread
+class BatchedFileSink(EventSink):
+    def __init__(self, path: str, batch_size: int = 1000, interval: float = 1.0):
+        """
+        Open ``path`` for appending and start the writer thread.
+
+        Args:
+            path: File to append JSON lines to
+            batch_size: Buffered events that trigger a write
+            interval: Seconds after which buffered events are written anyway
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.batch_size = batch_size
+        self.interval = interval
+        self._buffer = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._file = open(path, "a")
+        self._thread = threading.Thread(target=self._run, name="BatchedFileSink", daemon=True)
+        self._thread.start()
+
+    def emit(self, name: str, template: str, **data) -> None:
+        # Only appends to memory; the writer thread does all file I/O
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Sink has been closed")
+            self._buffer.append(Event(time.time(), name, template, data))
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def _drain(self) -> None:
+        # Taking and writing under one lock keeps batches in emit order
+        with self._write_lock:
+            with self._condition:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Event]) -> None:
+        lines = "".join(
+            json.dumps(
+                {"timestamp": event.timestamp, "event": event.name, "message": format_event(event), **event.data},
+                default=str,
+            )
+            + "\n"
+            for event in batch
+        )
+        self._file.write(lines)
+        self._file.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._condition.wait(self.interval)
+                closed = self._closed
+            self._drain()
+            if closed:
+                return
+
+    def flush(self) -> None:
+        """Write buffered events now, from the calling thread."""
+        self._drain()
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+        self._file.close()
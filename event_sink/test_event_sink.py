@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from event_sink.event_sink_impl import BatchedFileSink, NullSink, RingBufferSink, StdoutSink
+from observer.observer import EmailService, InventoryService, OrderManager
+from state.checkout_system.checkout_context import CheckoutContext
+
+
+class TestEventSinks(unittest.TestCase):
+
+    def test_null_sink(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            NullSink().emit("cart.processing", "Processing cart...")
+        self.assertEqual(output.getvalue(), "")
+
+    def test_stdout_sink(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            StdoutSink().emit("payment.succeeded", "Remaining balance: {balance}", balance=70)
+        self.assertEqual(output.getvalue(), "Remaining balance: 70\n")
+
+    def test_ring_buffer_sink(self):
+        sink = RingBufferSink(capacity=2)
+        for balance in range(3):
+            sink.emit("payment.succeeded", "Remaining balance: {balance}", balance=balance)
+
+        self.assertEqual(sink.messages(), ["Remaining balance: 1", "Remaining balance: 2"])
+        self.assertEqual(sink.events()[-1].data, {"balance": 2})
+        sink.clear()
+        self.assertEqual(sink.events(), [])
+
+    def test_batched_file_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl")
+
+            # Size threshold
+            sink = BatchedFileSink(path, batch_size=2, interval=60)
+            sink.emit("order.status_changed", "Order {order_id}", order_id="ORD-1")
+            sink.emit("order.status_changed", "Order {order_id}", order_id="ORD-2")
+            deadline = time.monotonic() + 5
+            while os.path.getsize(path) == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            sink.close()
+
+            # Time threshold
+            sink = BatchedFileSink(path, batch_size=100, interval=0.01)
+            sink.emit("order.status_changed", "Order {order_id}", order_id="ORD-3")
+            deadline = time.monotonic() + 5
+            while len(open(path).readlines()) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            sink.emit("order.status_changed", "Order {order_id}", order_id="ORD-4")
+            sink.close()
+            sink.close()
+
+            # Events emitted after close would never be written
+            with self.assertRaises(RuntimeError):
+                sink.emit("order.status_changed", "Order {order_id}", order_id="ORD-5")
+
+            with open(path) as source:
+                records = [json.loads(line) for line in source]
+
+        self.assertEqual([r["order_id"] for r in records], ["ORD-1", "ORD-2", "ORD-3", "ORD-4"])
+        self.assertEqual(records[0]["event"], "order.status_changed")
+        self.assertEqual(records[0]["message"], "Order ORD-1")
+
+
+class TestSinkIntegration(unittest.TestCase):
+
+    def test_checkout_emits_events(self):
+        sink = RingBufferSink()
+        context = CheckoutContext(100, 10, 3, sink=sink)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            context.handle()
+            context.handle()
+            context.handle()
+
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(
+            [event.name for event in sink.events()],
+            ["cart.processing", "cart.validated", "payment.processing", "payment.succeeded", "order.confirmed"],
+        )
+        self.assertEqual(sink.events()[3].data, {"balance": 70})
+
+    def test_order_manager_emits_events(self):
+        sink = RingBufferSink()
+        manager = OrderManager(sink=sink)
+        manager.attach(EmailService(sink))
+        manager.attach(InventoryService(sink))
+        manager.update_order("ORD-001", "Shipped")
+
+        self.assertEqual(
+            sink.messages(),
+            [
+                "Order ORD-001 status changed to Shipped",
+                "[Email] Order ORD-001 is now Shipped",
+                "[Inventory] Adjusting stock for order ORD-001, status: Shipped",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
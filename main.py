@@ -18,27 +18,29 @@ def strategy():
 
 
 def decorator():
-    # Start with base price of $100
-    base_price = BasePrice()
-    print(f"Base Price: ${base_price.calculate(100):.2f}")
-    
-    # Add seasonal discount (10% off)I
-    with_seasonal = SeasonalDiscount(base_price)
-    print(f"With Seasonal Discount: ${with_seasonal.calculate(100):.2f}")
-    
-    # Add promo code ($5 off)
-    with_promo = PromoCodeDiscount(with_seasonal, code="SAVE5")
-    print(f"With Promo Code: ${with_promo.calculate(100):.2f}")
-    
-    # Add loyalty discount (Level 2 = 7.5% off)
-    with_loyalty = LoyaltyDiscount(with_promo, loyalty_level=2)
-    print(f"With Loyalty: ${with_loyalty.calculate(100):.2f}")
-    
-    # Add bulk discount for 15 items (15% off)
-    with_bulk = BulkDiscount(with_loyalty, quantity=15, threshold=10)
-    print(f"With Bulk Discount: ${with_bulk.calculate(100):.2f}")
-    
-    # Finally, add tax
-    final_price = TaxCalculator(with_bulk)
-    print(f"Final Price with Tax: ${final_price.calculate(100):.2f}")
-    print(f"Price Description: {final_price.description}")
\ No newline at end of file
+    # Start with base price of $100, then add seasonal discount (10% off),
+    # promo code ($5 off), loyalty discount (Level 2 = 7.5% off),
+    # bulk discount for 15 items (15% off) and finally tax
+    final_price = TaxCalculator(
+        BulkDiscount(
+            LoyaltyDiscount(
+                PromoCodeDiscount(SeasonalDiscount(BasePrice()), code="SAVE5"),
+                loyalty_level=2,
+            ),
+            quantity=15,
+            threshold=10,
+        )
+    )
+
+    # Walk the chain once instead of recalculating every prefix
+    captions = [
+        "Base Price",
+        "With Seasonal Discount",
+        "With Promo Code",
+        "With Loyalty",
+        "With Bulk Discount",
+        "Final Price with Tax",
+    ]
+    for caption, step in zip(captions, final_price.explain(100)):
+        print(f"{caption}: ${step.output:.2f}")
+    print(f"Price Description: {final_price.description}")
@@ -0,0 +1,189 @@
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import Dict, Sequence
+
+from event_sink.event_sink_impl import STDOUT_SINK
+
+
+class Backpressure(Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    REJECT = "reject"
+
+
+# Delivers notifications for an OrderManager
+class Dispatcher(ABC):
+    @abstractmethod
+    def dispatch(self, observers: Sequence, order_id, status) -> None:
+        pass
+
+    @abstractmethod
+    def dispatch_many(self, batches: Dict) -> None:
+        """Hand each observer its own list of (order_id, status) updates."""
+
+    def flush(self) -> None:
+        """Wait until every dispatched notification has been delivered."""
+
+    def shutdown(self) -> None:
+        """Deliver what is pending and release any resources."""
+
+
+# Calls each observer from the caller's thread, like the original notify()
+class InlineDispatcher(Dispatcher):
+    def dispatch(self, observers: Sequence, order_id, status) -> None:
+        for observer in observers:
+            observer.update(order_id, status)
+
+    def dispatch_many(self, batches: Dict) -> None:
+        for observer, updates in batches.items():
+            observer.update_many(updates)
+
+
+# One worker thread and bounded queue; each observer always uses the same lane
+class _Lane:
+    def __init__(self, name: str, maxsize: int, backpressure: Backpressure, on_error):
+        self.maxsize = maxsize
+        self.backpressure = backpressure
+        self.dropped = 0
+        self._on_error = on_error
+        self._items = deque()
+        self._unfinished = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item) -> None:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Dispatcher has been shut down")
+            if len(self._items) >= self.maxsize:
+                if self.backpressure is Backpressure.REJECT:
+                    raise queue.Full("Notification queue is full")
+                if self.backpressure is Backpressure.DROP_OLDEST:
+                    self._items.popleft()
+                    self._unfinished -= 1
+                    self.dropped += 1
+                else:
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        raise RuntimeError("Dispatcher has been shut down")
+            self._items.append(item)
+            self._unfinished += 1
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._items and not self._closed:
+                    self._condition.wait()
+                if not self._items:
+                    return
+                observers, method, args = self._items.popleft()
+                # Wake producers blocked on a full queue
+                self._condition.notify_all()
+
+            for observer in observers:
+                try:
+                    getattr(observer, method)(*args)
+                except Exception as error:
+                    self._on_error(observer, method, error)
+
+            with self._condition:
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._condition.notify_all()
+
+    def flush(self) -> None:
+        with self._condition:
+            while self._unfinished:
+                self._condition.wait()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+# Hands notifications to worker threads so update_order never waits on observers
+class QueuedDispatcher(Dispatcher):
+    def __init__(
+        self,
+        workers: int = 4,
+        maxsize: int = 10000,
+        backpressure: Backpressure = Backpressure.BLOCK,
+        sink=None,
+    ):
+        """
+        Start ``workers`` lanes, each with its own thread and queue.
+
+        Args:
+            workers: Worker threads; an observer is always served by the same one,
+                so it sees its notifications in order
+            maxsize: Notifications a lane may hold before backpressure applies
+            backpressure: Whether a full lane blocks the caller, drops its oldest
+                notification or raises queue.Full
+            sink: Where observer failures are reported (prints by default)
+        """
+        if workers < 1:
+            raise ValueError("There must be at least one worker")
+        if maxsize < 1:
+            raise ValueError("Queue size must be at least 1")
+        self.sink = sink if sink is not None else STDOUT_SINK
+        self._lanes = [
+            _Lane(f"QueuedDispatcher-{index}", maxsize, Backpressure(backpressure), self._report)
+            for index in range(workers)
+        ]
+        # id of each observers sequence seen -> (sequence, its lane groups)
+        self._groupings = {}
+
+    @property
+    def dropped(self) -> int:
+        """Notifications discarded under the drop-oldest policy."""
+        return sum(lane.dropped for lane in self._lanes)
+
+    def _report(self, observer, method, error) -> None:
+        self.sink.emit(
+            "observer.failed",
+            "[Dispatcher] {observer}.{method} failed: {error!r}",
+            observer=type(observer).__name__,
+            method=method,
+            error=error,
+        )
+
+    def _group(self, observers: Sequence):
+        # An observer's lane follows from its hash, so it never changes and the
+        # observer keeps seeing notifications in order
+        groups = {}
+        for observer in observers:
+            groups.setdefault(hash(observer) % len(self._lanes), []).append(observer)
+        return tuple((self._lanes[lane], tuple(members)) for lane, members in groups.items())
+
+    def dispatch(self, observers: Sequence, order_id, status) -> None:
+        # Sequences handed over by the manager are reused until its observers
+        # change, so the cost per update grows with workers, not observers
+        grouping = self._groupings.get(id(observers))
+        if grouping is None or grouping[0] is not observers:
+            if len(self._groupings) >= 1024:
+                self._groupings.clear()
+            grouping = self._groupings[id(observers)] = (observers, self._group(observers))
+        for lane, members in grouping[1]:
+            lane.put((members, "update", (order_id, status)))
+
+    def dispatch_many(self, batches: Dict) -> None:
+        # One queue item per observer batch, on that observer's usual lane
+        for observer, updates in batches.items():
+            self._lanes[hash(observer) % len(self._lanes)].put(((observer,), "update_many", (updates,)))
+
+    def flush(self) -> None:
+        for lane in self._lanes:
+            lane.flush()
+
+    def shutdown(self) -> None:
+        for lane in self._lanes:
+            lane.close()
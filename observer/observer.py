@@ -1,52 +1,339 @@
+import weakref
 from abc import ABC, abstractmethod
+from bisect import bisect_left
+from itertools import count
+
+if not __package__:
+    # Run as a script (python observer/observer.py): import the sibling
+    # packages from the repository root, not from this directory
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_sink.event_sink_impl import STDOUT_SINK
+from observer.dispatcher import InlineDispatcher
 
 # Observer Interface
 class OrderObserver(ABC):
+    def __init__(self, sink=None):
+        # Where the observer reports what it did (prints by default)
+        self.sink = sink if sink is not None else STDOUT_SINK
+
     @abstractmethod
     def update(self, order_id, status):
         pass
 
+    def update_many(self, updates):
+        """Receive a batch of (order_id, status) updates; override to handle it at once."""
+        for order_id, status in updates:
+            self.update(order_id, status)
+
 # Concrete Observers
 class EmailService(OrderObserver):
     def update(self, order_id, status):
-        print(f"[Email] Order {order_id} is now {status}")
+        self.sink.emit("email.sent", "[Email] Order {order_id} is now {status}", order_id=order_id, status=status)
 
 class InventoryService(OrderObserver):
     def update(self, order_id, status):
-        print(f"[Inventory] Adjusting stock for order {order_id}, status: {status}")
+        self.sink.emit("inventory.adjusted", "[Inventory] Adjusting stock for order {order_id}, status: {status}", order_id=order_id, status=status)
 
 class DashboardService(OrderObserver):
     def update(self, order_id, status):
-        print(f"[Dashboard] Order {order_id} updated to {status}")
+        self.sink.emit("dashboard.updated", "[Dashboard] Order {order_id} updated to {status}", order_id=order_id, status=status)
+
+# Stands in for an observer held only weakly; does nothing once it is gone
+class _WeakObserver:
+    def __init__(self, observer, callback):
+        self.ref = weakref.ref(observer, callback)
+
+    def update(self, order_id, status):
+        observer = self.ref()
+        if observer is not None:
+            observer.update(order_id, status)
+
+    def update_many(self, updates):
+        observer = self.ref()
+        if observer is not None:
+            observer.update_many(updates)
+
+
+class _Bucket:
+    """Observers one status reaches, in attach order, as parallel lists."""
+
+    __slots__ = ("sequences", "observers", "prefixes", "prefixed")
+
+    def __init__(self, other=None):
+        self.sequences = list(other.sequences) if other is not None else []
+        self.observers = list(other.observers) if other is not None else []
+        self.prefixes = list(other.prefixes) if other is not None else []
+        # Members filtering on an order id prefix
+        self.prefixed = other.prefixed if other is not None else 0
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def add(self, sequence, observer, prefix):
+        # New observers have the highest sequence number, so usually go last
+        sequences = self.sequences
+        position = len(sequences)
+        if position and sequences[-1] > sequence:
+            position = bisect_left(sequences, sequence)
+        sequences.insert(position, sequence)
+        self.observers.insert(position, observer)
+        self.prefixes.insert(position, prefix)
+        if prefix is not None:
+            self.prefixed += 1
+
+    def remove(self, sequence):
+        position = bisect_left(self.sequences, sequence)
+        del self.sequences[position]
+        del self.observers[position]
+        if self.prefixes.pop(position) is not None:
+            self.prefixed -= 1
+
+    def route(self):
+        # Observers and, if any filters on order id, their prefixes
+        prefixes = tuple(self.prefixes) if self.prefixed else None
+        return tuple(self.observers), prefixes, {}
+
 
 # Subject
 class OrderManager:
-    def __init__(self):
-        self._observers = []
-        self._order_status = {}
+    def __init__(self, sink=None, dispatcher=None, status_log=None):
+        # id(observer) -> (observer or its weak stand-in, statuses it wants or
+        # None for all, order id prefix or None, attach sequence number)
+        self._observers = {}
+        self._attached = count()
+        # Entries of collected weak observers, removed before the next lookup
+        self._collected = []
+        # status -> _Bucket of everyone it reaches; None holds the unfiltered
+        # observers, and only statuses someone filters on have their own
+        self._buckets = {None: _Bucket()}
+        # status -> route built from its bucket, dropped when the bucket changes
+        self._index = {}
+        self.sink = sink if sink is not None else STDOUT_SINK
+        # Inline by default; a QueuedDispatcher delivers from worker threads
+        self.dispatcher = dispatcher if dispatcher is not None else InlineDispatcher()
+        # Optional OrderStatusLog; statuses survive restarts by replaying it
+        self.status_log = status_log
+        self._order_status = status_log.replay() if status_log is not None else {}
 
-    def attach(self, observer: OrderObserver):
-        self._observers.append(observer)
+    def attach(self, observer: OrderObserver, statuses=None, order_prefix=None, weak=False):
+        """
+        Subscribe an observer, optionally to only some updates.
+
+        Args:
+            observer: Observer to notify; attaching it again replaces its filters
+            statuses: Status or statuses the observer wants, or None for all
+            order_prefix: Only notify for order ids starting with this prefix
+            weak: Hold the observer weakly, so it is detached once garbage collected
+        """
+        self._remove_collected()
+        if isinstance(statuses, str):
+            statuses = (statuses,)
+        key = id(observer)
+        target = observer
+        if weak:
+            manager = weakref.ref(self)
+
+            def collected(_):
+                # Called from the garbage collector: only record the removal
+                alive = manager()
+                if alive is not None:
+                    alive._collected.append((key, target))
+
+            target = _WeakObserver(observer, collected)
+
+        previous = self._observers.get(key)
+        if previous is not None:
+            # Re-attaching keeps the observer's place in the notification order
+            self._unindex(previous)
+            sequence = previous[3]
+        else:
+            sequence = next(self._attached)
+        entry = self._observers[key] = (
+            target,
+            frozenset(statuses) if statuses is not None else None,
+            order_prefix,
+            sequence,
+        )
+        self._reindex(entry)
 
     def detach(self, observer: OrderObserver):
-        self._observers.remove(observer)
+        self._remove_collected()
+        try:
+            entry = self._observers.pop(id(observer))
+        except KeyError:
+            raise ValueError("Observer is not attached") from None
+        self._unindex(entry)
+
+    def __len__(self):
+        self._remove_collected()
+        return len(self._observers)
+
+    def _remove_collected(self):
+        while self._collected:
+            key, target = self._collected.pop()
+            # The id may already belong to a newer observer
+            entry = self._observers.get(key)
+            if entry is not None and entry[0] is target:
+                del self._observers[key]
+                self._unindex(entry)
+
+    def _reindex(self, entry):
+        # Add an observer to the buckets it is reached through
+        target, wanted, prefix, sequence = entry
+        buckets = self._buckets
+        if wanted is None:
+            for bucket in buckets.values():
+                bucket.add(sequence, target, prefix)
+            self._index.clear()
+            return
+        for status in wanted:
+            bucket = buckets.get(status)
+            if bucket is None:
+                bucket = buckets[status] = _Bucket(buckets[None])
+            bucket.add(sequence, target, prefix)
+            self._index.pop(status, None)
+
+    def _unindex(self, entry):
+        # Remove an observer from the buckets it is reached through
+        _, wanted, _, sequence = entry
+        buckets = self._buckets
+        if wanted is None:
+            for bucket in buckets.values():
+                bucket.remove(sequence)
+            self._index.clear()
+            return
+        unfiltered = len(buckets[None])
+        for status in wanted:
+            bucket = buckets[status]
+            bucket.remove(sequence)
+            if len(bucket) == unfiltered:
+                # Nobody filters on this status any more
+                del buckets[status]
+            self._index.pop(status, None)
+
+    def _route(self, status):
+        # Observers for ``status`` in attach order, and the prefixes of those
+        # that filter on order id (None when none of them do). Routes are
+        # immutable tuples, so observers detaching during a notification
+        # never disturb the loop delivering it
+        index = self._index
+        bucket = self._buckets.get(status)
+        if bucket is None:
+            # Statuses nobody filters on reach only the unfiltered observers
+            route = index.get(None)
+            if route is None:
+                route = index[None] = self._buckets[None].route()
+        else:
+            route = bucket.route()
+        index[status] = route
+        return route
+
+    def subscribers(self, order_id, status):
+        """Return the observers that should be told about this update."""
+        if self._collected:
+            self._remove_collected()
+        route = self._index.get(status)
+        if route is None:
+            route = self._route(status)
+        observers, prefixes, matches = route
+        if prefixes is None:
+            return observers
+
+        # Equal match patterns share one tuple so dispatchers can reuse their work;
+        # ids that aren't strings, such as ints, are matched on their text
+        if order_id.__class__ is not str:
+            order_id = str(order_id)
+        matched = tuple(prefix is None or order_id.startswith(prefix) for prefix in prefixes)
+        selected = matches.get(matched)
+        if selected is None:
+            selected = matches[matched] = tuple(
+                observer for observer, keep in zip(observers, matched) if keep
+            )
+        return selected
 
     def notify(self, order_id, status):
-        for observer in self._observers:
-            observer.update(order_id, status)
+        observers = self.subscribers(order_id, status)
+        if observers:
+            self.dispatcher.dispatch(observers, order_id, status)
+
+    def update_orders(self, updates, coalesce=False):
+        """
+        Apply many status changes at once.
+
+        Args:
+            updates: Iterable of (order_id, status) pairs, in the order they happened
+            coalesce: Keep only the final status of each order, in the order
+                of those final changes, so observers never hear about changes
+                superseded within the batch
+
+        Every interested observer gets a single update_many() call with its
+        share of the batch, in order.
+        """
+        if coalesce:
+            # Each order moves to its last change, so the batch keeps the
+            # order in which the surviving changes happened
+            latest = {}
+            for order_id, status in updates:
+                latest.pop(order_id, None)
+                latest[order_id] = status
+            updates = list(latest.items())
+        else:
+            updates = list(updates)
+        if not updates:
+            return
+
+        self._order_status.update(updates)
+        if self.status_log is not None:
+            self.status_log.append_many(updates)
+        self.sink.emit("order.statuses_changed", "{count} order statuses changed", count=len(updates))
+
+        routes = [self.subscribers(order_id, status) for order_id, status in updates]
+        first = routes[0]
+        if all(route is first for route in routes):
+            # Common case, e.g. a whole feed going to "Shipped": one shared batch
+            batches = dict.fromkeys(first, tuple(updates))
+        else:
+            batches = {}
+            for update, observers in zip(updates, routes):
+                for observer in observers:
+                    batch = batches.get(observer)
+                    if batch is None:
+                        batch = batches[observer] = []
+                    batch.append(update)
+        if batches:
+            self.dispatcher.dispatch_many(batches)
+
+    def flush(self):
+        """Wait until every notification so far has reached its observers."""
+        self.dispatcher.flush()
+        if self.status_log is not None:
+            self.status_log.flush()
+
+    def shutdown(self):
+        """Deliver pending notifications, stop the dispatcher and close the log."""
+        self.dispatcher.shutdown()
+        if self.status_log is not None:
+            self.status_log.close()
 
     def update_order(self, order_id, status):
         self._order_status[order_id] = status
-        print(f"Order {order_id} status changed to {status}")
+        if self.status_log is not None:
+            self.status_log.append(order_id, status)
+        self.sink.emit("order.status_changed", "Order {order_id} status changed to {status}", order_id=order_id, status=status)
         self.notify(order_id, status)
 
 # Usage
-order_manager = OrderManager()
+if __name__ == "__main__":
+    order_manager = OrderManager()
 
-# Register observers
-order_manager.attach(EmailService())
-order_manager.attach(InventoryService())
-order_manager.attach(DashboardService())
+    # Register observers
+    order_manager.attach(EmailService())
+    order_manager.attach(InventoryService(), statuses=("Shipped", "Cancelled"))
+    order_manager.attach(DashboardService())
 
-# Update an order
-order_manager.update_order("ORD-001", "Shipped")
+    # Update an order
+    order_manager.update_order("ORD-001", "Shipped")
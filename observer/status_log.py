@@ -0,0 +1,218 @@
+import os
+import struct
+import threading
+import time
+
+
+class OrderStatusLog:
+    """
+    Append-only binary log of order status changes.
+
+    Each status string is written once, as a definition record giving it a
+    small integer code, and every update after that stores only the code and
+    the order id. Updates are buffered and written in batches of
+    ``batch_size``; a background thread writes and fsyncs whatever is still
+    pending once ``sync_interval`` seconds have passed since the last fsync,
+    so no update waits longer than that on a quiet system. flush() and
+    close() write and fsync at once. Order ids come back from replay() as
+    ints if they were ints, and as strs otherwise.
+    """
+
+    MAGIC = b"OSL1"
+    # tag, status code, length of the status or order id that follows
+    RECORD = struct.Struct("<BHH")
+    _STATUS = 1
+    _UPDATE = 2
+    # An update whose order id was an int
+    _UPDATE_INT = 3
+
+    def __init__(self, path, batch_size=4096, sync_interval=1.0):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        if sync_interval <= 0:
+            raise ValueError("Sync interval must be positive")
+        self.path = path
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self._codes = {}
+        self._buffer = bytearray()
+        self._pending = 0
+        # Whether written records still await an fsync
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._closed = False
+        self._condition = threading.Condition()
+        # Held for file I/O, so appends only wait on the buffer swap
+        self._write_lock = threading.RLock()
+        self._open()
+        self._thread = threading.Thread(target=self._run, name="OrderStatusLog", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.write(self.MAGIC)
+            self._file.flush()
+        statuses, end = self._scan()
+        self._codes = {status: code for code, status in enumerate(statuses)}
+        # Drop a record torn by a crash so new records start on a boundary
+        self._file.truncate(end)
+        self._file.seek(end)
+
+    def _scan(self, order_status=None):
+        """
+        Read every complete record, applying updates to ``order_status`` if given.
+
+        Returns:
+            The interned statuses by code, and the offset after the last complete record
+        """
+        self._file.seek(0)
+        data = self._file.read()
+        if data[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"{self.path} is not an order status log")
+
+        statuses = []
+        unpack_from = self.RECORD.unpack_from
+        header = self.RECORD.size
+        offset = len(self.MAGIC)
+        end = len(data)
+        while offset + header <= end:
+            tag, code, length = unpack_from(data, offset)
+            start = offset + header
+            offset = start + length
+            if offset > end:
+                # Torn final record
+                offset = start - header
+                break
+            if tag == self._UPDATE:
+                if order_status is not None:
+                    order_status[data[start:offset].decode()] = statuses[code]
+            elif tag == self._UPDATE_INT:
+                if order_status is not None:
+                    order_status[int(data[start:offset])] = statuses[code]
+            elif tag == self._STATUS:
+                statuses.append(data[start:offset].decode())
+            else:
+                raise ValueError(f"Corrupt record at offset {start - header} of {self.path}")
+        return statuses, offset
+
+    def replay(self):
+        """Return the latest status of every order in the log, keyed by order id."""
+        with self._write_lock:
+            self._drain()
+            order_status = {}
+            self._scan(order_status)
+            return order_status
+
+    def _code(self, status):
+        code = self._codes.get(status)
+        if code is None:
+            code = self._codes[status] = len(self._codes)
+            encoded = status.encode()
+            self._buffer += self.RECORD.pack(self._STATUS, code, len(encoded))
+            self._buffer += encoded
+        return code
+
+    def _update(self, order_id, code):
+        # Ints are tagged so replay() gives back the same keys
+        if isinstance(order_id, int):
+            tag, order_id = self._UPDATE_INT, b"%d" % order_id
+        else:
+            tag, order_id = self._UPDATE, str(order_id).encode()
+        return self.RECORD.pack(tag, code, len(order_id)) + order_id
+
+    def append(self, order_id, status):
+        with self._condition:
+            if not self._buffer:
+                # Start the clock on the background sync
+                self._condition.notify()
+            self._buffer += self._update(order_id, self._code(status))
+            self._pending += 1
+            full = self._pending >= self.batch_size
+        if full:
+            self._drain()
+
+    def append_many(self, updates):
+        for order_id, status in updates:
+            self.append(order_id, status)
+
+    def _drain(self, sync=False):
+        # Taking and writing under one lock keeps batches in append order
+        with self._write_lock:
+            with self._condition:
+                batch, self._buffer = self._buffer, bytearray()
+                self._pending = 0
+                if batch:
+                    self._unsynced = True
+                sync = sync or (self._unsynced and time.monotonic() - self._last_sync >= self.sync_interval)
+            if batch:
+                self._file.write(batch)
+                self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+                with self._condition:
+                    self._unsynced = False
+                    self._last_sync = time.monotonic()
+
+    def _run(self):
+        # Sync pending updates at most sync_interval after the last fsync
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if not self._buffer and not self._unsynced:
+                    self._condition.wait()
+                    continue
+                remaining = self._last_sync + self.sync_interval - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self._drain(sync=True)
+
+    def flush(self):
+        """Write buffered updates and fsync them."""
+        self._drain(sync=True)
+
+    def compact(self):
+        """Rewrite the log down to the latest status of each order."""
+        # Appends wait too, as they intern statuses against the rewritten file
+        with self._write_lock, self._condition:
+            order_status = self.replay()
+            self._file.close()
+
+            temporary = self.path + ".compact"
+            with open(temporary, "wb") as target:
+                target.write(self.MAGIC)
+                codes = {}
+                records = bytearray()
+                for order_id, status in order_status.items():
+                    code = codes.get(status)
+                    if code is None:
+                        code = codes[status] = len(codes)
+                        encoded = status.encode()
+                        records += self.RECORD.pack(self._STATUS, code, len(encoded)) + encoded
+                    records += self._update(order_id, code)
+                target.write(records)
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temporary, self.path)
+            self._open()
+            self._unsynced = False
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,473 @@
+import gc
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+
+from event_sink.event_sink_impl import NullSink, RingBufferSink
+from observer.dispatcher import Backpressure, QueuedDispatcher
+from observer.observer import OrderManager, OrderObserver
+from observer.status_log import OrderStatusLog
+
+
+# Records every notification it receives
+class RecordingObserver(OrderObserver):
+    def __init__(self, sink=None):
+        super().__init__(sink)
+        self.updates = []
+
+    def update(self, order_id, status):
+        self.updates.append((order_id, status))
+
+
+# Blocks every update until released
+class GatedObserver(RecordingObserver):
+    def __init__(self, sink=None):
+        super().__init__(sink)
+        self.gate = threading.Event()
+
+    def update(self, order_id, status):
+        self.gate.wait()
+        super().update(order_id, status)
+
+
+class FailingObserver(OrderObserver):
+    def update(self, order_id, status):
+        raise RuntimeError("mail server down")
+
+
+class TestOrderManager(unittest.TestCase):
+
+    def test_inline_notify(self):
+        manager = OrderManager(sink=NullSink())
+        first, second = RecordingObserver(), RecordingObserver()
+        manager.attach(first)
+        manager.attach(second)
+        manager.update_order("ORD-001", "Shipped")
+        manager.detach(second)
+        manager.update_order("ORD-001", "Delivered")
+
+        self.assertEqual(first.updates, [("ORD-001", "Shipped"), ("ORD-001", "Delivered")])
+        self.assertEqual(second.updates, [("ORD-001", "Shipped")])
+
+
+# Counts batch deliveries separately from single updates
+class BatchObserver(RecordingObserver):
+    def __init__(self, sink=None):
+        super().__init__(sink)
+        self.batches = 0
+
+    def update_many(self, updates):
+        self.batches += 1
+        self.updates.extend(updates)
+
+
+class TestUpdateOrders(unittest.TestCase):
+
+    def test_bulk_update(self):
+        manager = OrderManager(sink=NullSink())
+        batch, single = BatchObserver(), RecordingObserver()
+        manager.attach(batch)
+        manager.attach(single)
+
+        updates = [(f"ORD-{index}", "Shipped") for index in range(1000)]
+        manager.update_orders(updates)
+
+        self.assertEqual(batch.batches, 1)
+        self.assertEqual(list(batch.updates), updates)
+        self.assertEqual(single.updates, updates)
+        self.assertEqual(manager._order_status["ORD-999"], "Shipped")
+
+    def test_coalesce(self):
+        manager = OrderManager(sink=NullSink())
+        observer = BatchObserver()
+        manager.attach(observer)
+        updates = [("ORD-1", "Packed"), ("ORD-2", "Packed"), ("ORD-1", "Shipped"), ("ORD-1", "Delivered")]
+
+        manager.update_orders(updates, coalesce=True)
+        self.assertEqual(observer.updates, [("ORD-2", "Packed"), ("ORD-1", "Delivered")])
+
+        manager.update_orders(updates)
+        self.assertEqual(len(observer.updates), 6)
+        self.assertEqual(manager._order_status, {"ORD-1": "Delivered", "ORD-2": "Packed"})
+
+        # Surviving changes keep the order in which they happened
+        observer.updates.clear()
+        manager.update_orders([("A", "Paid"), ("B", "Paid"), ("A", "Shipped")], coalesce=True)
+        self.assertEqual(observer.updates, [("B", "Paid"), ("A", "Shipped")])
+
+    def test_filters_apply_to_batches(self):
+        dispatcher = QueuedDispatcher(workers=2)
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        shipping, europe = BatchObserver(), BatchObserver()
+        manager.attach(shipping, statuses="Shipped")
+        manager.attach(europe, order_prefix="EU-")
+
+        manager.update_orders([("EU-1", "Packed"), ("US-1", "Shipped"), ("EU-2", "Shipped")])
+        manager.shutdown()
+
+        self.assertEqual(shipping.updates, [("US-1", "Shipped"), ("EU-2", "Shipped")])
+        self.assertEqual(europe.updates, [("EU-1", "Packed"), ("EU-2", "Shipped")])
+        self.assertEqual((shipping.batches, europe.batches), (1, 1))
+
+
+# Detaches itself, or another observer, while being notified
+class DetachingObserver(RecordingObserver):
+    def __init__(self, manager, victim=None):
+        super().__init__()
+        self.manager = manager
+        self.victim = victim if victim is not None else self
+        self.detached = False
+
+    def update(self, order_id, status):
+        super().update(order_id, status)
+        if not self.detached:
+            self.manager.detach(self.victim)
+            self.detached = True
+
+
+class TestObserverRegistry(unittest.TestCase):
+
+    def test_weak_observer_is_dropped_when_collected(self):
+        manager = OrderManager(sink=NullSink())
+        kept = RecordingObserver()
+        manager.attach(kept)
+        manager.attach(RecordingObserver(), weak=True)
+        gc.collect()
+
+        self.assertEqual(len(manager), 1)
+        manager.update_order("ORD-001", "Shipped")
+        self.assertEqual(kept.updates, [("ORD-001", "Shipped")])
+
+    def test_weak_observer_is_notified_while_alive(self):
+        manager = OrderManager(sink=NullSink())
+        dashboard = RecordingObserver()
+        manager.attach(dashboard, statuses="Shipped", weak=True)
+        manager.update_order("ORD-001", "Shipped")
+        manager.detach(dashboard)
+        manager.update_order("ORD-002", "Shipped")
+        self.assertEqual(dashboard.updates, [("ORD-001", "Shipped")])
+
+    def test_detach_during_notify(self):
+        manager = OrderManager(sink=NullSink())
+        last = RecordingObserver()
+        manager.attach(DetachingObserver(manager))
+        manager.attach(DetachingObserver(manager, victim=last))
+        manager.attach(last)
+
+        manager.update_order("ORD-001", "Shipped")
+        manager.update_order("ORD-002", "Shipped")
+        self.assertEqual(len(manager), 1)
+        # The notification in progress still reaches everyone it started with
+        self.assertEqual(last.updates, [("ORD-001", "Shipped")])
+
+    def test_detach_unknown_observer(self):
+        manager = OrderManager(sink=NullSink())
+        with self.assertRaises(ValueError):
+            manager.detach(RecordingObserver())
+
+    def test_many_observers_come_and_go(self):
+        manager = OrderManager(sink=NullSink())
+        observers = [RecordingObserver() for _ in range(5000)]
+        for observer in observers:
+            manager.attach(observer, weak=True)
+        for observer in observers[::2]:
+            manager.detach(observer)
+        self.assertEqual(len(manager), 2500)
+        del observers
+        gc.collect()
+        self.assertEqual(len(manager), 0)
+
+
+class TestSubscriptions(unittest.TestCase):
+
+    def test_status_filter(self):
+        manager = OrderManager(sink=NullSink())
+        everything, shipping = RecordingObserver(), RecordingObserver()
+        manager.attach(everything)
+        manager.attach(shipping, statuses=("Shipped", "Delivered"))
+
+        for status in ["Placed", "Shipped", "Cancelled", "Delivered"]:
+            manager.update_order("ORD-001", status)
+
+        self.assertEqual(len(everything.updates), 4)
+        self.assertEqual([status for _, status in shipping.updates], ["Shipped", "Delivered"])
+
+    def test_order_prefix_filter(self):
+        manager = OrderManager(sink=NullSink())
+        europe, us_returns = RecordingObserver(), RecordingObserver()
+        manager.attach(europe, order_prefix="EU-")
+        manager.attach(us_returns, statuses="Returned", order_prefix="US-")
+
+        manager.update_order("EU-1", "Shipped")
+        manager.update_order("US-1", "Shipped")
+        manager.update_order("US-2", "Returned")
+        manager.update_order("EU-2", "Returned")
+
+        self.assertEqual(europe.updates, [("EU-1", "Shipped"), ("EU-2", "Returned")])
+        self.assertEqual(us_returns.updates, [("US-2", "Returned")])
+
+        # Int ids are matched on their decimal text, and delivered unchanged
+        numbered = RecordingObserver()
+        manager.attach(numbered, order_prefix="12")
+        manager.update_order(123, "Shipped")
+        manager.update_order(456, "Shipped")
+
+        self.assertEqual(numbered.updates, [(123, "Shipped")])
+        self.assertEqual(europe.updates[-1], ("EU-2", "Returned"))
+
+    def test_uninterested_observers_are_not_dispatched(self):
+        manager = OrderManager(sink=NullSink())
+        for _ in range(50):
+            manager.attach(RecordingObserver(), statuses="Cancelled")
+        shipping = RecordingObserver()
+        manager.attach(shipping, statuses="Shipped")
+
+        self.assertEqual(manager.subscribers("ORD-001", "Shipped"), (shipping,))
+        self.assertEqual(manager.subscribers("ORD-001", "Placed"), ())
+        # The same update always resolves to the same tuple
+        self.assertIs(manager.subscribers("ORD-001", "Shipped"), manager.subscribers("ORD-002", "Shipped"))
+
+        manager.detach(shipping)
+        self.assertEqual(manager.subscribers("ORD-001", "Shipped"), ())
+
+    def test_index_follows_attach_and_detach(self):
+        manager = OrderManager(sink=NullSink())
+        observers = [RecordingObserver() for _ in range(6)]
+        statuses = [None, "Shipped", ("Shipped", "Delivered"), None, "Delivered", "Shipped"]
+        prefixes = [None, "EU-", None, "US-", None, None]
+        for observer, wanted, prefix in zip(observers, statuses, prefixes):
+            manager.attach(observer, statuses=wanted, order_prefix=prefix)
+
+        def expected(order_id, status):
+            # Every attached observer whose filters match, in attach order
+            return tuple(
+                observer
+                for observer, wanted, prefix in zip(observers, statuses, prefixes)
+                if observer in attached
+                and (wanted is None or status in ((wanted,) if isinstance(wanted, str) else wanted))
+                and (prefix is None or order_id.startswith(prefix))
+            )
+
+        attached = set(observers)
+        for step in [0, 2, 5, 1, 3]:
+            manager.detach(observers[step])
+            attached.discard(observers[step])
+            for order_id in ("EU-1", "US-1"):
+                for status in ("Shipped", "Delivered", "Placed"):
+                    self.assertEqual(manager.subscribers(order_id, status), expected(order_id, status))
+
+        # Re-attaching with new filters keeps the observer's place in the order
+        newcomer = RecordingObserver()
+        manager.attach(newcomer, statuses="Placed")
+        manager.attach(observers[4], statuses="Placed")
+        self.assertEqual(manager.subscribers("EU-1", "Placed"), (observers[4], newcomer))
+        self.assertEqual(manager.subscribers("EU-1", "Delivered"), ())
+
+
+class TestOrderStatusLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "orders.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_statuses_survive_restart(self):
+        manager = OrderManager(sink=NullSink(), status_log=OrderStatusLog(self.path))
+        manager.update_order("ORD-1", "Packed")
+        manager.update_orders([("ORD-2", "Packed"), ("ORD-1", "Shipped")])
+        manager.shutdown()
+
+        restarted = OrderManager(sink=NullSink(), status_log=OrderStatusLog(self.path))
+        self.assertEqual(restarted._order_status, {"ORD-1": "Shipped", "ORD-2": "Packed"})
+        restarted.shutdown()
+
+    def test_statuses_are_interned(self):
+        with OrderStatusLog(self.path) as log:
+            for index in range(1000):
+                log.append(f"ORD-{index}", "Shipped")
+        # One definition record, then a 5 byte header and the id per update
+        expected = len(OrderStatusLog.MAGIC) + 5 + len("Shipped")
+        expected += sum(5 + len(f"ORD-{index}") for index in range(1000))
+        self.assertEqual(os.path.getsize(self.path), expected)
+
+    def test_compact(self):
+        with OrderStatusLog(self.path) as log:
+            for status in ["Placed", "Packed", "Shipped", "Delivered"]:
+                log.append_many((f"ORD-{index}", status) for index in range(100))
+            log.flush()
+            before = os.path.getsize(self.path)
+            log.compact()
+            self.assertLess(os.path.getsize(self.path), before / 3)
+            log.append("ORD-0", "Returned")
+
+        with OrderStatusLog(self.path) as log:
+            order_status = log.replay()
+        self.assertEqual(len(order_status), 100)
+        self.assertEqual(order_status["ORD-0"], "Returned")
+        self.assertEqual(order_status["ORD-99"], "Delivered")
+
+    def test_torn_record_is_dropped(self):
+        with OrderStatusLog(self.path) as log:
+            log.append("ORD-1", "Shipped")
+            log.append("ORD-2", "Shipped")
+        with open(self.path, "r+b") as target:
+            target.truncate(os.path.getsize(self.path) - 2)
+
+        with OrderStatusLog(self.path) as log:
+            self.assertEqual(log.replay(), {"ORD-1": "Shipped"})
+            log.append("ORD-3", "Packed")
+        with OrderStatusLog(self.path) as log:
+            self.assertEqual(log.replay(), {"ORD-1": "Shipped", "ORD-3": "Packed"})
+
+    def test_order_id_types_survive_replay(self):
+        with OrderStatusLog(self.path) as log:
+            log.append(123, "Packed")
+            log.append("123", "Shipped")
+            log.append(-7, "Placed")
+            self.assertEqual(log.replay(), {123: "Packed", "123": "Shipped", -7: "Placed"})
+            log.compact()
+        with OrderStatusLog(self.path) as log:
+            self.assertEqual(log.replay(), {123: "Packed", "123": "Shipped", -7: "Placed"})
+
+    def test_quiet_log_is_written_within_sync_interval(self):
+        log = OrderStatusLog(self.path, batch_size=1000, sync_interval=0.05)
+        empty = os.path.getsize(self.path)
+        log.append("ORD-1", "Shipped")
+        deadline = time.monotonic() + 5
+        while os.path.getsize(self.path) == empty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(os.path.getsize(self.path), empty)
+        log.close()
+        log.close()
+
+        with self.assertRaises(ValueError):
+            OrderStatusLog(self.path, sync_interval=0)
+
+    def test_append_does_not_wait_for_fsync(self):
+        log = OrderStatusLog(self.path)
+        log.append("ORD-1", "Shipped")
+        release = threading.Event()
+        syncing = threading.Event()
+        fsync = os.fsync
+
+        def slow_fsync(descriptor):
+            syncing.set()
+            release.wait(5)
+            fsync(descriptor)
+
+        os.fsync = slow_fsync
+        try:
+            flusher = threading.Thread(target=log.flush)
+            flusher.start()
+            self.assertTrue(syncing.wait(5))
+            started = time.monotonic()
+            log.append("ORD-2", "Packed")
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+            flusher.join()
+        finally:
+            os.fsync = fsync
+        self.assertEqual(log.replay(), {"ORD-1": "Shipped", "ORD-2": "Packed"})
+        log.close()
+
+    def test_rejects_foreign_file(self):
+        with open(self.path, "wb") as target:
+            target.write(b"not a log")
+        with self.assertRaises(ValueError):
+            OrderStatusLog(self.path)
+
+
+class TestQueuedDispatcher(unittest.TestCase):
+
+    def test_slow_observer_does_not_block_update(self):
+        dispatcher = QueuedDispatcher(workers=2)
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        slow, fast = GatedObserver(), RecordingObserver()
+        manager.attach(slow)
+        manager.attach(fast)
+
+        statuses = ["Placed", "Packed", "Shipped", "Delivered"]
+        for status in statuses:
+            manager.update_order("ORD-001", status)
+        self.assertEqual(slow.updates, [])
+
+        slow.gate.set()
+        manager.flush()
+        expected = [("ORD-001", status) for status in statuses]
+        self.assertEqual(slow.updates, expected)
+        self.assertEqual(fast.updates, expected)
+        manager.shutdown()
+
+    def test_order_is_kept_per_observer(self):
+        dispatcher = QueuedDispatcher(workers=3, maxsize=8)
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        observers = [RecordingObserver() for _ in range(5)]
+        for observer in observers:
+            manager.attach(observer)
+
+        for index in range(500):
+            manager.update_order(f"ORD-{index}", "Shipped")
+        manager.shutdown()
+
+        expected = [(f"ORD-{index}", "Shipped") for index in range(500)]
+        for observer in observers:
+            self.assertEqual(observer.updates, expected)
+
+    def test_drop_oldest(self):
+        dispatcher = QueuedDispatcher(workers=1, maxsize=2, backpressure=Backpressure.DROP_OLDEST)
+        observer = GatedObserver()
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        manager.attach(observer)
+
+        manager.update_order("ORD-0", "Shipped")
+        # Wait until the worker holds ORD-0 so the queue itself is empty
+        while dispatcher._lanes[0]._items:
+            pass
+        for index in range(1, 5):
+            manager.update_order(f"ORD-{index}", "Shipped")
+
+        observer.gate.set()
+        manager.shutdown()
+        self.assertEqual(dispatcher.dropped, 2)
+        self.assertEqual([order_id for order_id, _ in observer.updates], ["ORD-0", "ORD-3", "ORD-4"])
+
+    def test_reject(self):
+        dispatcher = QueuedDispatcher(workers=1, maxsize=1, backpressure="reject")
+        observer = GatedObserver()
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        manager.attach(observer)
+
+        manager.update_order("ORD-0", "Shipped")
+        while dispatcher._lanes[0]._items:
+            pass
+        manager.update_order("ORD-1", "Shipped")
+        with self.assertRaises(queue.Full):
+            manager.update_order("ORD-2", "Shipped")
+
+        observer.gate.set()
+        manager.shutdown()
+        with self.assertRaises(RuntimeError):
+            manager.update_order("ORD-3", "Shipped")
+
+    def test_failures_are_reported(self):
+        sink = RingBufferSink()
+        dispatcher = QueuedDispatcher(workers=1, sink=sink)
+        manager = OrderManager(sink=NullSink(), dispatcher=dispatcher)
+        recorder = RecordingObserver()
+        manager.attach(FailingObserver())
+        manager.attach(recorder)
+
+        manager.update_order("ORD-001", "Shipped")
+        manager.shutdown()
+
+        self.assertEqual(recorder.updates, [("ORD-001", "Shipped")])
+        self.assertEqual([event.name for event in sink.events()], ["observer.failed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,301 @@
+"""Stream a price file through a PriceCalculator chain.
+
+Usage:
+    python3 reprice.py catalog.csv repriced.csv --seasonal 10 --loyalty 2 --tax 8.25
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from decorators.price_calculator.chain_registry import ChainRegistry
+from decorators.price_calculator.prices import BasePrice
+from decorators.price_calculator.price_calculator_decorator_impl import SeasonalDiscount, PromoCodeDiscount, LoyaltyDiscount, BulkDiscount, TaxCalculator
+
+
+def detect_format(path):
+    """Return "jsonl" or "csv" based on the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    return "jsonl" if extension in (".jsonl", ".ndjson") else "csv"
+
+
+class MalformedRow(dict):
+    """A line that could not be parsed into a row, kept as {"raw": line}."""
+
+    def __init__(self, raw, error):
+        super().__init__(raw=raw)
+        self.error = error
+
+
+def read_rows(stream, file_format):
+    """Yield one dict per SKU line, or a MalformedRow for lines that do not parse."""
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield MalformedRow(line.rstrip("\n"), f"Invalid JSON: {error}")
+                continue
+            if not isinstance(row, dict):
+                yield MalformedRow(line.rstrip("\n"), "Row is not a JSON object")
+                continue
+            yield row
+
+
+def format_rows(rows, file_format, fieldnames=None):
+    """Render dict rows as (header, body) text; the header is empty for JSONL."""
+    if not rows:
+        return "", ""
+    if file_format == "jsonl":
+        return "", "".join(json.dumps(row) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames or list(rows[0]), extrasaction="ignore")
+    writer.writeheader()
+    header = buffer.getvalue()
+    writer.writerows(rows)
+    return header, buffer.getvalue()[len(header):]
+
+
+class RowWriter:
+    """Writes dict rows as CSV or JSONL, writing the CSV header on first use."""
+
+    def __init__(self, stream, file_format):
+        self.stream = stream
+        self.file_format = file_format
+        self._fieldnames = None
+        self._header_written = False
+
+    def write_rows(self, rows):
+        if rows and self._fieldnames is None:
+            self._fieldnames = list(rows[0])
+        self.write_formatted(*format_rows(rows, self.file_format, self._fieldnames))
+
+    def write_formatted(self, header, body):
+        """Write already rendered rows, keeping only the first header."""
+        if not body:
+            return
+        if header and not self._header_written:
+            self.stream.write(header)
+            self._header_written = True
+        self.stream.write(body)
+
+
+def reprice_chunk(chain, rows, price_field="price", decimals=2):
+    """
+    Price one chunk of rows in a single vectorized pass.
+
+    Returns:
+        (priced rows, rejected rows) - malformed rows and rows whose price is
+        missing, not a number or negative are rejected with an "error" field
+        instead of aborting the whole run
+    """
+    prices = np.full(len(rows), np.nan)
+    errors = [None] * len(rows)
+    for index, row in enumerate(rows):
+        if isinstance(row, MalformedRow):
+            errors[index] = row.error
+            continue
+        if not isinstance(row, dict):
+            errors[index] = "Row is not a mapping"
+            continue
+        try:
+            prices[index] = float(row[price_field])
+        except (KeyError, TypeError, ValueError):
+            prices[index] = np.nan
+        if not np.isfinite(prices[index]):
+            errors[index] = f"Invalid price: {row.get(price_field)!r}"
+
+    negative = np.flatnonzero(prices < 0)
+    for index in negative:
+        errors[index] = "Price cannot be negative"
+
+    valid = np.flatnonzero([error is None for error in errors])
+    results = chain.calculate_many(prices[valid])
+
+    priced = []
+    for index, result in zip(valid, results):
+        row = dict(rows[index])
+        row["final_price"] = round(float(result), decimals)
+        priced.append(row)
+
+    rejected = []
+    for index, error in enumerate(errors):
+        if error is not None:
+            row = dict(rows[index]) if isinstance(rows[index], dict) else {"raw": repr(rows[index])}
+            row["error"] = error
+            rejected.append(row)
+
+    return priced, rejected
+
+
+def reprice_stream(chain, rows, writer, reject_writer, chunk_size=10000, price_field="price", decimals=2):
+    """
+    Reprice an iterable of rows chunk by chunk so memory use stays flat.
+
+    Returns:
+        (rows priced, rows rejected, elapsed seconds)
+    """
+    rows = iter(rows)
+    priced_count = rejected_count = 0
+    started = time.perf_counter()
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        priced, rejected = reprice_chunk(chain, chunk, price_field, decimals)
+        writer.write_rows(priced)
+        reject_writer.write_rows(rejected)
+        priced_count += len(priced)
+        rejected_count += len(rejected)
+
+    return priced_count, rejected_count, time.perf_counter() - started
+
+
+# Chains rebuilt inside each worker process, keyed by fingerprint
+_worker_chains = ChainRegistry()
+
+
+def reprice_shard(fingerprint, lines, formats, fieldnames, price_field, decimals):
+    """
+    Reprice one shard of raw lines inside a worker process.
+
+    Only the chain's fingerprint and the raw text cross the process boundary
+    in either direction, which keeps pickling cheap next to parsing, pricing
+    and formatting the shard.
+    """
+    input_format, output_format, reject_format = formats
+    chain = _worker_chains.get(fingerprint)
+    if input_format == "csv":
+        rows = list(csv.DictReader(lines, fieldnames=fieldnames))
+    else:
+        rows = list(read_rows(lines, input_format))
+    priced, rejected = reprice_chunk(chain, rows, price_field, decimals)
+    return (
+        format_rows(priced, output_format),
+        format_rows(rejected, reject_format),
+        len(priced),
+        len(rejected),
+    )
+
+
+def reprice_parallel(chain, stream, formats, writer, reject_writer, workers, chunk_size=10000, price_field="price", decimals=2):
+    """
+    Reprice a file across worker processes, one shard of lines per task.
+
+    Shards are written back in their original order and at most two per
+    worker are in flight, so memory stays flat. Each SKU must be on a
+    single line.
+
+    Returns:
+        (rows priced, rows rejected, elapsed seconds)
+    """
+    fieldnames = next(csv.reader([stream.readline()])) if formats[0] == "csv" else None
+    fingerprint = chain.fingerprint
+    priced_count = rejected_count = 0
+    pending = deque()
+    started = time.perf_counter()
+
+    def collect():
+        nonlocal priced_count, rejected_count
+        priced, rejected, priced_rows, rejected_rows = pending.popleft().result()
+        writer.write_formatted(*priced)
+        reject_writer.write_formatted(*rejected)
+        priced_count += priced_rows
+        rejected_count += rejected_rows
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            lines = list(islice(stream, chunk_size))
+            if not lines:
+                break
+            pending.append(
+                pool.submit(reprice_shard, fingerprint, lines, formats, fieldnames, price_field, decimals)
+            )
+            if len(pending) >= workers * 2:
+                collect()
+        while pending:
+            collect()
+
+    return priced_count, rejected_count, time.perf_counter() - started
+
+
+def build_chain(args):
+    """Build the chain in the same order as main.decorator()."""
+    chain = BasePrice()
+    if args.seasonal is not None:
+        chain = SeasonalDiscount(chain, discount_percent=args.seasonal)
+    if args.promo is not None:
+        chain = PromoCodeDiscount(chain, discount_amount=args.promo, min_purchase=args.min_purchase, code=args.code)
+    if args.loyalty is not None:
+        chain = LoyaltyDiscount(chain, loyalty_level=args.loyalty)
+    if args.quantity is not None:
+        chain = BulkDiscount(chain, quantity=args.quantity, threshold=args.threshold, discount_percent=args.bulk_percent)
+    if args.tax is not None:
+        chain = TaxCalculator(chain, tax_rate=args.tax)
+    return chain
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reprice a CSV or JSONL catalog through a discount chain.")
+    parser.add_argument("input", help="CSV or JSONL file with one SKU per line")
+    parser.add_argument("output", help="file to write priced rows to (format follows the extension)")
+    parser.add_argument("--rejects", help="file for rows that fail validation (default: <output>.rejects<ext>)")
+    parser.add_argument("--price-field", default="price", help="column holding the price (default: price)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows read and written per chunk")
+    parser.add_argument("--decimals", type=int, default=2, help="decimal places for final prices")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes; above 1 the file is sharded across them")
+
+    chain = parser.add_argument_group("pricing chain")
+    chain.add_argument("--seasonal", type=float, metavar="PERCENT", help="seasonal discount percentage")
+    chain.add_argument("--promo", type=float, metavar="AMOUNT", help="flat promo code discount")
+    chain.add_argument("--min-purchase", type=float, default=0.0, help="minimum price for the promo")
+    chain.add_argument("--code", help="promo code identifier")
+    chain.add_argument("--loyalty", type=int, metavar="LEVEL", help="loyalty level (1-3)")
+    chain.add_argument("--quantity", type=int, help="quantity purchased, enables the bulk discount")
+    chain.add_argument("--threshold", type=int, default=10, help="minimum quantity for the bulk discount")
+    chain.add_argument("--bulk-percent", type=float, default=15.0, help="bulk discount percentage")
+    chain.add_argument("--tax", type=float, metavar="RATE", help="tax rate percentage")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.chunk_size < 1:
+        raise SystemExit("--chunk-size must be at least 1")
+    if args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+
+    chain = build_chain(args)
+    root, extension = os.path.splitext(args.output)
+    rejects = args.rejects or f"{root}.rejects{extension}"
+
+    with open(args.input, newline="") as source, open(args.output, "w", newline="") as target, open(rejects, "w", newline="") as reject_target:
+        formats = (detect_format(args.input), detect_format(args.output), detect_format(rejects))
+        writer = RowWriter(target, formats[1])
+        reject_writer = RowWriter(reject_target, formats[2])
+        if args.workers > 1:
+            priced, rejected, elapsed = reprice_parallel(chain, source, formats, writer, reject_writer, args.workers, args.chunk_size, args.price_field, args.decimals)
+        else:
+            rows = read_rows(source, formats[0])
+            priced, rejected, elapsed = reprice_stream(chain, rows, writer, reject_writer, args.chunk_size, args.price_field, args.decimals)
+
+    rate = (priced + rejected) / elapsed if elapsed else 0.0
+    print(f"Priced {priced} rows, rejected {rejected} ({rate:,.0f} rows/s) using {chain.description}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
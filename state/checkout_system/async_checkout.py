@@ -0,0 +1,120 @@
+# checkout_system/async_checkout.py
+import asyncio
+from abc import ABC, abstractmethod
+
+from state.checkout_system.checkout_engine import CheckoutOutcome
+from state.checkout_system.checkout_state_impl import (
+    CartState,
+    PaymentState,
+    ConfirmationState,
+    CONFIRMATION_STATE,
+)
+
+
+# Gateway Interface
+class PaymentGateway(ABC):
+    @abstractmethod
+    async def charge(self, amount) -> bool:
+        """Charge ``amount``, returning whether the payment was approved."""
+        pass
+
+
+class FakePaymentGateway(PaymentGateway):
+    """Local stand-in for a real gateway, with configurable latency."""
+
+    def __init__(self, latency=0.05, approve=True):
+        self.latency = latency
+        self.approve = approve
+        self.charges = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def charge(self, amount) -> bool:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.approve:
+            self.charges.append(amount)
+        return self.approve
+
+
+class AsyncCheckout:
+    """
+    Runs the checkout state machine with a payment step that awaits a gateway.
+
+    Many contexts can wait on the gateway at once, up to ``limit``, so
+    throughput is bounded by gateway concurrency instead of serial waits.
+    An instance belongs to the event loop it is first used in.
+    """
+
+    def __init__(self, gateway: PaymentGateway, limit=100):
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        self.gateway = gateway
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def pay(self, context):
+        """Async counterpart of PaymentState.handle()."""
+        sink = context.sink
+        sink.emit("payment.processing", "Processing payment...")
+
+        # Funds are checked and reserved without awaiting in between, so
+        # other coroutines can't spend them while the gateway is working
+        total = context.get_total_cost()
+        if not context.has_sufficient_funds():
+            sink.emit(
+                "cart.insufficient_funds",
+                "Insufficient funds. Cannot proceed to payment.",
+                balance=context.user_info["balance"],
+                total=total,
+            )
+            context.record_rejection()
+            return CheckoutOutcome.INSUFFICIENT_FUNDS
+        context.user_info["balance"] -= total
+
+        try:
+            async with self._semaphore:
+                approved = await self.gateway.charge(total)
+        except BaseException:
+            # A failed or cancelled charge took nothing: release the reservation
+            context.user_info["balance"] += total
+            context.record_rejection()
+            raise
+
+        if not approved:
+            context.user_info["balance"] += total
+            sink.emit("payment.declined", "Payment declined.", total=total)
+            context.record_rejection()
+            return CheckoutOutcome.PAYMENT_DECLINED
+
+        sink.emit(
+            "payment.succeeded",
+            "Payment successful. Remaining balance: {balance}",
+            balance=context.user_info["balance"],
+        )
+        context.set_state(CONFIRMATION_STATE)
+        return None
+
+    async def checkout(self, context):
+        """Advance one context until it is confirmed or rejected."""
+        while True:
+            state = context.state
+            if isinstance(state, CartState):
+                if not context.handle():
+                    return CheckoutOutcome.INSUFFICIENT_FUNDS
+            elif isinstance(state, PaymentState):
+                outcome = await self.pay(context)
+                if outcome is not None:
+                    return outcome
+            elif isinstance(state, ConfirmationState):
+                state.handle(context)
+                return CheckoutOutcome.CONFIRMED
+            else:
+                raise TypeError(f"Unknown checkout state: {type(state).__name__}")
+
+    async def run(self, contexts):
+        """Check out many contexts concurrently, returning outcomes in order."""
+        return list(await asyncio.gather(*(self.checkout(context) for context in contexts)))
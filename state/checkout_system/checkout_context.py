@@ -1,11 +1,19 @@
-from checkout_system.checkout_state_impl import CartState
-from checkout_system.checkout_state import CheckoutState
+from event_sink.event_sink_impl import STDOUT_SINK
 
 
 # checkout_system/checkout_context.py
 class CheckoutContext:
-    def __init__(self, user_balance=0, product_price=0, product_quantity=0):
-        from checkout_system.checkout_state_impl import CartState
+    __slots__ = ("sink", "metrics", "entered_at", "user_info", "product_info", "state")
+
+    def __init__(self, user_balance=0, product_price=0, product_quantity=0, sink=None, metrics=None):
+        from state.checkout_system.checkout_state_impl import CART_STATE
+
+        # Where state handlers report what they did (prints by default)
+        self.sink = sink if sink is not None else STDOUT_SINK
+
+        # Optional shared CheckoutMetrics, and when the current state began
+        self.metrics = metrics
+        self.entered_at = metrics.clock() if metrics is not None else 0.0
         
         # Store user and product data
         self.user_info = {
@@ -18,15 +26,26 @@ class CheckoutContext:
         }
         
         # Initialize with default state
-        self.state = CartState()
+        self.state = CART_STATE
     
     def set_state(self, state):
         """Change the current state of the checkout process"""
+        if self.metrics is not None:
+            self.entered_at = self.metrics.record_transition(self.state, state, self.entered_at)
         self.state = state
     
     def handle(self):
         """Execute the current state's behavior"""
-        self.state.handle(self)
+        state = self.state
+        result = state.handle(self)
+        if result is False and self.metrics is not None:
+            self.metrics.record_rejection(state)
+        return result
+
+    def record_rejection(self):
+        """Count the current state as rejecting this checkout, for paths that bypass handle()"""
+        if self.metrics is not None:
+            self.metrics.record_rejection(self.state)
     
     def get_total_cost(self):
         """Calculate the total cost of items in cart"""
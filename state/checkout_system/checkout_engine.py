@@ -0,0 +1,87 @@
+# checkout_system/checkout_engine.py
+from enum import Enum
+
+from state.checkout_system.checkout_state_impl import (
+    CartState,
+    PaymentState,
+    ConfirmationState,
+    PAYMENT_STATE,
+    CONFIRMATION_STATE,
+)
+
+
+class CheckoutOutcome(Enum):
+    CONFIRMED = "confirmed"
+    INSUFFICIENT_FUNDS = "insufficient_funds"
+    PAYMENT_DECLINED = "payment_declined"
+
+
+# Silent versions of each state's handle(): do the work, return an event
+def _validate_cart(context):
+    return "validated" if context.has_sufficient_funds() else "insufficient_funds"
+
+
+def _take_payment(context):
+    context.user_info["balance"] -= context.get_total_cost()
+    return "paid"
+
+
+def _confirm(context):
+    return "confirmed"
+
+
+ACTIONS = {
+    CartState: _validate_cart,
+    PaymentState: _take_payment,
+    ConfirmationState: _confirm,
+}
+
+# (state, event) -> next shared state
+TRANSITIONS = {
+    (CartState, "validated"): PAYMENT_STATE,
+    (PaymentState, "paid"): CONFIRMATION_STATE,
+}
+
+# Events that end a context's run
+OUTCOMES = {
+    "confirmed": CheckoutOutcome.CONFIRMED,
+    "insufficient_funds": CheckoutOutcome.INSUFFICIENT_FUNDS,
+}
+
+
+class CheckoutEngine:
+    """Advances many checkout contexts through Cart -> Payment -> Confirmation."""
+
+    def __init__(self, actions=None, transitions=None, outcomes=None):
+        self.actions = actions or ACTIONS
+        self.transitions = transitions or TRANSITIONS
+        self.outcomes = outcomes or OUTCOMES
+
+    def run(self, contexts):
+        """
+        Run every context until it is confirmed or rejected, without printing.
+
+        Contexts resume from whatever state they are in and are left in the
+        state they stopped at, just as if handle() had been called by hand.
+        Every state change goes through set_state() and every outcome other
+        than CONFIRMED counts as a rejection, so metrics match handle().
+
+        Returns:
+            One CheckoutOutcome per context, in order
+        """
+        actions, transitions, outcomes = self.actions, self.transitions, self.outcomes
+        results = []
+        for context in contexts:
+            state = context.state
+            while True:
+                state_type = type(state)
+                event = actions[state_type](context)
+                outcome = outcomes.get(event)
+                if outcome is not None:
+                    break
+                state = transitions[state_type, event]
+                context.set_state(state)
+            if outcome is not CheckoutOutcome.CONFIRMED:
+                context.record_rejection()
+            results.append(outcome)
+        return results
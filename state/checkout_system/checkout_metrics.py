@@ -0,0 +1,151 @@
+# checkout_system/checkout_metrics.py
+import time
+
+from state.checkout_system.checkout_state_impl import CART_STATE, PAYMENT_STATE, CONFIRMATION_STATE
+
+# Upper bounds, in seconds, of the time-in-state histogram buckets; the last
+# bucket catches everything slower
+BUCKET_BOUNDS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 600.0, 3600.0)
+
+# States every CheckoutMetrics knows up front; others are added when first seen
+CHECKOUT_STATES = (CART_STATE, PAYMENT_STATE, CONFIRMATION_STATE)
+
+_monotonic = time.monotonic
+
+
+class CheckoutMetrics:
+    """
+    Low-overhead checkout funnel counters, shared by any number of contexts.
+
+    Each known state has a small integer index, and every (from, to) pair
+    owns a fixed run of time-in-state buckets in one flat list of counts, so
+    recording a transition is a clock read, two dict lookups for precomputed
+    offsets and an increment. Counts per transition and histograms per state
+    are summed up only in snapshot().
+    """
+
+    def __init__(self, bounds=BUCKET_BOUNDS, states=CHECKOUT_STATES):
+        self.bounds = tuple(bounds)
+        self._width = len(self.bounds) + 1
+        self._states = []
+        # State -> offset of its rows when leaving it, and of its run in a row
+        self._from_offsets = {}
+        self._to_offsets = {}
+        self._counts = []
+        self._rejections = []
+        for state in states:
+            self._add_state(state)
+
+    @staticmethod
+    def clock():
+        return _monotonic()
+
+    def _add_state(self, state):
+        """Give ``state`` the next index, moving recorded counts to the wider layout."""
+        width, old_size = self._width, len(self._states)
+        size = old_size + 1
+        counts = [0] * (size * size * width)
+        for old in range(old_size):
+            for new in range(old_size):
+                source = (old * old_size + new) * width
+                target = (old * size + new) * width
+                counts[target:target + width] = self._counts[source:source + width]
+        self._states.append(state)
+        self._from_offsets = {known: index * size * width for index, known in enumerate(self._states)}
+        self._to_offsets = {known: index * width for index, known in enumerate(self._states)}
+        self._counts = counts
+        self._rejections.append(0)
+
+    def record_transition(self, old_state, new_state, entered_at):
+        """
+        Count a transition and file the time spent in ``old_state``.
+
+        Returns:
+            The clock reading, which becomes the new state's entry time
+        """
+        now = _monotonic()
+        elapsed = now - entered_at
+        try:
+            offset = self._from_offsets[old_state] + self._to_offsets[new_state]
+        except KeyError:
+            offset = self._add_transition(old_state, new_state)
+        # A short scan beats a search over this few bounds, and most stop early
+        for bound in self.bounds:
+            if elapsed < bound:
+                break
+            offset += 1
+        self._counts[offset] += 1
+        return now
+
+    def _add_transition(self, old_state, new_state):
+        for state in (old_state, new_state):
+            if state not in self._to_offsets:
+                self._add_state(state)
+        return self._from_offsets[old_state] + self._to_offsets[new_state]
+
+    def record_rejection(self, state):
+        try:
+            self._rejections[self._to_offsets[state] // self._width] += 1
+        except KeyError:
+            self._add_state(state)
+            self._rejections[-1] += 1
+
+    def snapshot(self):
+        """Return a point-in-time copy of all metrics as plain data."""
+        states, counts, width = list(self._states), list(self._counts), self._width
+        names = [type(state).__name__ for state in states]
+        transitions = {}
+        time_in_state = {}
+        for old, old_name in enumerate(names):
+            for new, new_name in enumerate(names):
+                start = (old * len(states) + new) * width
+                row = counts[start:start + width]
+                if not any(row):
+                    continue
+                transitions[f"{old_name}->{new_name}"] = sum(row)
+                histogram = time_in_state.setdefault(old_name, [0] * width)
+                for bucket, count in enumerate(row):
+                    histogram[bucket] += count
+
+        return {
+            "transitions": transitions,
+            "rejections": {name: count for name, count in zip(names, list(self._rejections)) if count},
+            "time_in_state": {"bounds": list(self.bounds), "counts": time_in_state},
+        }
+
+    def reset(self):
+        self._counts = [0] * len(self._counts)
+        self._rejections = [0] * len(self._rejections)
+
+
+def benchmark_overhead(contexts=20000, repeat=5):
+    """
+    Compare full checkouts reporting to a ring buffer with and without metrics.
+
+    Returns:
+        The relative overhead of instrumentation, e.g. 0.03 for 3%
+    """
+    from event_sink.event_sink_impl import RingBufferSink
+    from state.checkout_system.checkout_context import CheckoutContext
+
+    sink = RingBufferSink()
+
+    def run(metrics):
+        best = float("inf")
+        for _ in range(repeat):
+            batch = [CheckoutContext(100, 10, 3, sink=sink, metrics=metrics) for _ in range(contexts)]
+            started = time.perf_counter()
+            for context in batch:
+                context.handle()
+                context.handle()
+                context.handle()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    plain = run(None)
+    instrumented = run(CheckoutMetrics())
+    return instrumented / plain - 1
+
+
+if __name__ == "__main__":
+    print(f"Instrumentation overhead: {benchmark_overhead():.1%}")
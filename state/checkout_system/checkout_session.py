@@ -0,0 +1,251 @@
+# checkout_system/checkout_session.py
+import mmap
+import os
+import struct
+from enum import IntEnum
+
+from state.checkout_system.checkout_context import CheckoutContext
+from state.checkout_system.checkout_state_impl import (
+    CartState,
+    PaymentState,
+    ConfirmationState,
+    CART_STATE,
+    PAYMENT_STATE,
+    CONFIRMATION_STATE,
+)
+
+
+class CheckoutStateCode(IntEnum):
+    CART = 0
+    PAYMENT = 1
+    CONFIRMATION = 2
+
+
+STATE_CODES = {
+    CartState: CheckoutStateCode.CART,
+    PaymentState: CheckoutStateCode.PAYMENT,
+    ConfirmationState: CheckoutStateCode.CONFIRMATION,
+}
+STATES = {
+    CheckoutStateCode.CART: CART_STATE,
+    CheckoutStateCode.PAYMENT: PAYMENT_STATE,
+    CheckoutStateCode.CONFIRMATION: CONFIRMATION_STATE,
+}
+
+
+class CheckoutSession:
+    """Compact, dict-free copy of a CheckoutContext's data and state."""
+
+    __slots__ = ("balance", "price", "quantity", "state", "account_id")
+
+    def __init__(self, balance, price, quantity, state=CheckoutStateCode.CART, account_id=None):
+        self.balance = balance
+        self.price = price
+        self.quantity = quantity
+        self.state = CheckoutStateCode(state)
+        # user_info["account_id"], if set; it picks ConcurrentCheckout's lock,
+        # but a restored context still has a balance copy of its own
+        self.account_id = account_id
+
+    @classmethod
+    def from_context(cls, context):
+        return cls(
+            context.user_info["balance"],
+            context.product_info["price"],
+            context.product_info["quantity"],
+            STATE_CODES[type(context.state)],
+            context.user_info.get("account_id"),
+        )
+
+    def to_context(self, sink=None):
+        context = CheckoutContext(self.balance, self.price, self.quantity, sink=sink)
+        if self.account_id is not None:
+            context.user_info["account_id"] = self.account_id
+        context.set_state(STATES[self.state])
+        return context
+
+    def _fields(self):
+        return (self.balance, self.price, self.quantity, self.state, self.account_id)
+
+    def __eq__(self, other):
+        if not isinstance(other, CheckoutSession):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self):
+        account = f", account_id={self.account_id!r}" if self.account_id is not None else ""
+        return (
+            f"CheckoutSession(balance={self.balance!r}, price={self.price!r}, "
+            f"quantity={self.quantity!r}, state={self.state.name}{account})"
+        )
+
+
+class SessionStore:
+    """
+    Memory-mapped file of fixed-size session records.
+
+    Each record holds its own session id, and an id -> record index is
+    rebuilt from them when the store is opened, so a snapshot or restore is
+    a dict lookup and a single pack or unpack. Deleted records are reused
+    before the file grows, and it grows by doubling when every record is
+    taken. Session and account ids may be ints, strs or bytes of up to
+    ``KEY_SIZE`` bytes.
+    """
+
+    KEY_SIZE = 32
+    # used, state, int flags, id kind and length, account id kind and length,
+    # padding, balance, price, quantity, id, account id
+    RECORD = struct.Struct(f"<BBBBBBBxddq{KEY_SIZE}s{KEY_SIZE}s")
+    _BALANCE_IS_INT = 1
+    _PRICE_IS_INT = 2
+    # Kinds of stored keys; no account id is stored as _NONE
+    _NONE = 0
+    _INT = 1
+    _STR = 2
+    _BYTES = 3
+
+    def __init__(self, path, capacity=1024):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        exists = os.path.exists(path)
+        self._file = open(path, "r+b" if exists else "w+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size % self.RECORD.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a session store")
+        if size == 0:
+            size = capacity * self.RECORD.size
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._index = {}
+        self._free = []
+        self._load_index()
+
+    def _load_index(self):
+        # Free records are popped from the end, so the lowest is used first
+        unpack_from = self.RECORD.unpack_from
+        size = self.RECORD.size
+        for slot in reversed(range(self.capacity)):
+            record = unpack_from(self._map, slot * size)
+            if record[0]:
+                self._index[self._decode_key(record[3], record[4], record[10])] = slot
+            else:
+                self._free.append(slot)
+
+    @property
+    def capacity(self):
+        return len(self._map) // self.RECORD.size
+
+    def _grow(self):
+        capacity = self.capacity
+        self._map.close()
+        self._file.truncate(2 * capacity * self.RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 2 * capacity * self.RECORD.size)
+        self._free.extend(reversed(range(capacity, 2 * capacity)))
+
+    def _encode_key(self, key):
+        """Return the kind and bytes a session or account id is stored as."""
+        if key is None:
+            return self._NONE, b""
+        if isinstance(key, int):
+            kind, encoded = self._INT, key.to_bytes(key.bit_length() // 8 + 1, "little", signed=True)
+        elif isinstance(key, str):
+            kind, encoded = self._STR, key.encode()
+        elif isinstance(key, bytes):
+            kind, encoded = self._BYTES, key
+        else:
+            raise TypeError(f"Ids must be int, str or bytes, not {type(key).__name__}")
+        if len(encoded) > self.KEY_SIZE:
+            raise ValueError(f"Id {key!r} is longer than {self.KEY_SIZE} bytes")
+        return kind, encoded
+
+    def _decode_key(self, kind, length, encoded):
+        encoded = encoded[:length]
+        if kind == self._INT:
+            return int.from_bytes(encoded, "little", signed=True)
+        if kind == self._STR:
+            return encoded.decode()
+        if kind == self._BYTES:
+            return encoded
+        return None
+
+    def save(self, session_id, session):
+        """Write a CheckoutSession as the record for ``session_id``."""
+        slot = self._index.get(session_id)
+        id_kind, encoded_id = self._encode_key(session_id)
+        account_kind, encoded_account = self._encode_key(session.account_id)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+        flags = 0
+        if isinstance(session.balance, int):
+            flags |= self._BALANCE_IS_INT
+        if isinstance(session.price, int):
+            flags |= self._PRICE_IS_INT
+        self.RECORD.pack_into(
+            self._map,
+            slot * self.RECORD.size,
+            1,
+            session.state,
+            flags,
+            id_kind,
+            len(encoded_id),
+            account_kind,
+            len(encoded_account),
+            session.balance,
+            session.price,
+            session.quantity,
+            encoded_id,
+            encoded_account,
+        )
+        self._index[session_id] = slot
+
+    def load(self, session_id):
+        """Read the CheckoutSession stored for ``session_id``."""
+        slot = self._index[session_id]
+        (
+            _, state, flags, _, _, account_kind, account_length, balance, price, quantity, _, account
+        ) = self.RECORD.unpack_from(self._map, slot * self.RECORD.size)
+        if flags & self._BALANCE_IS_INT:
+            balance = int(balance)
+        if flags & self._PRICE_IS_INT:
+            price = int(price)
+        account_id = self._decode_key(account_kind, account_length, account)
+        return CheckoutSession(balance, price, quantity, state, account_id)
+
+    def snapshot(self, session_id, context):
+        """Store a live context so it can be dropped from memory."""
+        self.save(session_id, CheckoutSession.from_context(context))
+
+    def restore(self, session_id, sink=None):
+        """Rebuild the live context stored for ``session_id``."""
+        return self.load(session_id).to_context(sink=sink)
+
+    def delete(self, session_id):
+        slot = self._index.pop(session_id, None)
+        if slot is not None:
+            offset = slot * self.RECORD.size
+            self._map[offset:offset + self.RECORD.size] = bytes(self.RECORD.size)
+            self._free.append(slot)
+
+    def __contains__(self, session_id):
+        return session_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
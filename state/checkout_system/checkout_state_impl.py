@@ -1,43 +1,64 @@
-from checkout_system.checkout_state import CheckoutState
-from checkout_system.checkout_context import CheckoutContext
+from state.checkout_system.checkout_state import CheckoutState
 
 
 class CartState(CheckoutState):
     def handle(self, context):
         """Handle the cart state: verify if user can proceed to payment"""
-        print("Processing cart...")
+        sink = context.sink
+        sink.emit("cart.processing", "Processing cart...")
 
         if not context.has_sufficient_funds():
-            print("Insufficient funds. Cannot proceed to payment.")
+            sink.emit(
+                "cart.insufficient_funds",
+                "Insufficient funds. Cannot proceed to payment.",
+                balance=context.user_info["balance"],
+                total=context.get_total_cost(),
+            )
             return False
 
-        print("Cart validated. Proceeding to payment.")
-        context.set_state(PaymentState())
+        sink.emit("cart.validated", "Cart validated. Proceeding to payment.")
+        context.set_state(PAYMENT_STATE)
         return True
 
 
 class PaymentState(CheckoutState):
     def handle(self, context):
         """Handle the payment state: process the payment"""
-        print("Processing payment...")
+        sink = context.sink
+        sink.emit("payment.processing", "Processing payment...")
 
         # Simulate payment processing
         context.user_info["balance"] -= context.get_total_cost()
 
-        print(f"Payment successful. Remaining balance: {context.user_info['balance']}")
+        sink.emit(
+            "payment.succeeded",
+            "Payment successful. Remaining balance: {balance}",
+            balance=context.user_info["balance"],
+        )
 
         # Move to confirmation state
-        context.set_state(ConfirmationState())
+        context.set_state(CONFIRMATION_STATE)
         return True
 
 
 class ConfirmationState(CheckoutState):
     def handle(self, context):
         """Handle the confirmation state: complete the order"""
-        print("Order confirmed!")
-        print(
-            f"Purchased {context.product_info['quantity']} items at ${context.product_info['price']} each"
+        context.sink.emit(
+            "order.confirmed",
+            "Order confirmed!\n"
+            "Purchased {quantity} items at ${price} each\n"
+            "Total cost: ${total}\n"
+            "Your remaining balance: ${balance}",
+            quantity=context.product_info["quantity"],
+            price=context.product_info["price"],
+            total=context.get_total_cost(),
+            balance=context.user_info["balance"],
         )
-        print(f"Total cost: ${context.get_total_cost()}")
-        print(f"Your remaining balance: ${context.user_info['balance']}")
         return True
+
+
+# States hold no data of their own, so every context shares one instance of each
+CART_STATE = CartState()
+PAYMENT_STATE = PaymentState()
+CONFIRMATION_STATE = ConfirmationState()
@@ -0,0 +1,73 @@
+# checkout_system/concurrent_checkout.py
+import threading
+
+from state.checkout_system.checkout_engine import CheckoutOutcome
+from state.checkout_system.checkout_state_impl import (
+    CartState,
+    ConfirmationState,
+    PAYMENT_STATE,
+    CONFIRMATION_STATE,
+)
+
+
+class LockStripes:
+    """A fixed pool of locks shared out by account, so unrelated accounts rarely contend."""
+
+    def __init__(self, stripes=64):
+        if stripes < 1:
+            raise ValueError("There must be at least one lock stripe")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, account):
+        return self._locks[hash(account) % len(self._locks)]
+
+
+def account_key(context):
+    """
+    Pick the lock a context's checkout runs under.
+
+    A balance lives in a context's ``user_info`` dict, so only contexts that
+    share that one dict share a balance and are kept from overdrawing it. An
+    explicit ``user_info["account_id"]`` takes precedence when present, but
+    it only selects the lock: contexts holding separate dicts with the same
+    id still debit separate copies of the balance.
+    """
+    user_info = context.user_info
+    return user_info.get("account_id", id(user_info))
+
+
+class ConcurrentCheckout:
+    """
+    Checks out contexts from many threads without overdrawing shared balances.
+
+    A balance is shared by contexts holding the same ``user_info`` dict;
+    see account_key().
+    """
+
+    def __init__(self, stripes=64):
+        self._stripes = LockStripes(stripes)
+
+    def checkout(self, context):
+        """
+        Take a context straight to confirmation, checking funds and debiting
+        them as one atomic step under its account's lock.
+
+        Returns:
+            A CheckoutOutcome; rejected contexts are left in their state
+        """
+        if isinstance(context.state, ConfirmationState):
+            return CheckoutOutcome.CONFIRMED
+
+        with self._stripes.lock_for(account_key(context)):
+            funded = context.has_sufficient_funds()
+            if funded:
+                context.user_info["balance"] -= context.get_total_cost()
+
+        if not funded:
+            context.record_rejection()
+            return CheckoutOutcome.INSUFFICIENT_FUNDS
+        # Pass through payment like handle() would, so metrics see each step
+        if isinstance(context.state, CartState):
+            context.set_state(PAYMENT_STATE)
+        context.set_state(CONFIRMATION_STATE)
+        return CheckoutOutcome.CONFIRMED
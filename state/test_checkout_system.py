@@ -0,0 +1,377 @@
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from state.checkout_system.checkout_context import CheckoutContext
+from event_sink.event_sink_impl import NullSink, RingBufferSink
+from state.checkout_system.async_checkout import AsyncCheckout, FakePaymentGateway
+from state.checkout_system.concurrent_checkout import ConcurrentCheckout
+from state.checkout_system.checkout_metrics import CheckoutMetrics
+from state.checkout_system.checkout_engine import CheckoutEngine, CheckoutOutcome
+from state.checkout_system.checkout_session import CheckoutSession, CheckoutStateCode, SessionStore
+from state.checkout_system.checkout_state_impl import (
+    CartState,
+    ConfirmationState,
+    CART_STATE,
+    PAYMENT_STATE,
+    CONFIRMATION_STATE,
+)
+
+
+class TestCheckoutContext(unittest.TestCase):
+
+    def test_manual_checkout(self):
+        context = CheckoutContext(user_balance=100, product_price=10, product_quantity=3)
+        with redirect_stdout(io.StringIO()):
+            context.handle()
+            self.assertIs(context.state, PAYMENT_STATE)
+            context.handle()
+            self.assertIs(context.state, CONFIRMATION_STATE)
+            context.handle()
+        self.assertEqual(context.user_info["balance"], 70)
+
+    def test_insufficient_funds(self):
+        context = CheckoutContext(user_balance=10, product_price=10, product_quantity=3)
+        with redirect_stdout(io.StringIO()):
+            context.handle()
+        self.assertIs(context.state, CART_STATE)
+        self.assertEqual(context.user_info["balance"], 10)
+
+
+class TestCheckoutMetrics(unittest.TestCase):
+
+    def test_funnel_counts(self):
+        metrics = CheckoutMetrics()
+        sink = NullSink()
+        contexts = [
+            CheckoutContext(100, 10, 3, sink=sink, metrics=metrics),
+            CheckoutContext(100, 10, 3, sink=sink, metrics=metrics),
+            CheckoutContext(10, 10, 3, sink=sink, metrics=metrics),
+        ]
+        for context in contexts:
+            while context.handle() and context.state is not CONFIRMATION_STATE:
+                pass
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["transitions"], {
+            "CartState->PaymentState": 2,
+            "PaymentState->ConfirmationState": 2,
+        })
+        self.assertEqual(snapshot["rejections"], {"CartState": 1})
+        self.assertEqual(sum(snapshot["time_in_state"]["counts"]["CartState"]), 2)
+        self.assertEqual(
+            len(snapshot["time_in_state"]["counts"]["PaymentState"]),
+            len(snapshot["time_in_state"]["bounds"]) + 1,
+        )
+
+    def test_time_in_state_buckets(self):
+        metrics = CheckoutMetrics(bounds=(1.0, 10.0))
+        metrics.record_transition(CART_STATE, PAYMENT_STATE, metrics.clock() - 5)
+        metrics.record_transition(CART_STATE, PAYMENT_STATE, metrics.clock() - 50)
+        self.assertEqual(metrics.snapshot()["time_in_state"]["counts"]["CartState"], [0, 1, 1])
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["transitions"], {})
+
+    def test_batch_paths_record_every_step(self):
+        expected = {
+            "transitions": {
+                "CartState->PaymentState": 1,
+                "PaymentState->ConfirmationState": 1,
+            },
+            "rejections": {"CartState": 1},
+        }
+
+        def run_engine(contexts):
+            return CheckoutEngine().run(contexts)
+
+        def run_async(contexts):
+            return asyncio.run(AsyncCheckout(FakePaymentGateway(latency=0)).run(contexts))
+
+        def run_concurrent(contexts):
+            checkout = ConcurrentCheckout()
+            return [checkout.checkout(context) for context in contexts]
+
+        for run in (run_engine, run_async, run_concurrent):
+            with self.subTest(run.__name__):
+                metrics = CheckoutMetrics()
+                contexts = [
+                    CheckoutContext(100, 10, 3, sink=NullSink(), metrics=metrics),
+                    CheckoutContext(10, 10, 3, sink=NullSink(), metrics=metrics),
+                ]
+                run(contexts)
+                snapshot = metrics.snapshot()
+                self.assertEqual({key: snapshot[key] for key in expected}, expected)
+
+    def test_declined_payment_is_a_rejection(self):
+        metrics = CheckoutMetrics()
+        context = CheckoutContext(100, 10, 3, sink=NullSink(), metrics=metrics)
+        checkout = AsyncCheckout(FakePaymentGateway(latency=0, approve=False))
+        asyncio.run(checkout.checkout(context))
+        self.assertEqual(metrics.snapshot()["rejections"], {"PaymentState": 1})
+
+    def test_unknown_states_are_added(self):
+        class HoldState(CartState):
+            pass
+
+        metrics = CheckoutMetrics()
+        metrics.record_transition(CART_STATE, PAYMENT_STATE, metrics.clock())
+        hold = HoldState()
+        metrics.record_transition(PAYMENT_STATE, hold, metrics.clock())
+        metrics.record_rejection(hold)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["transitions"], {
+            "CartState->PaymentState": 1,
+            "PaymentState->HoldState": 1,
+        })
+        self.assertEqual(snapshot["rejections"], {"HoldState": 1})
+
+    def test_context_without_metrics(self):
+        context = CheckoutContext(100, 10, 3, sink=NullSink())
+        self.assertTrue(context.handle())
+        self.assertIs(context.state, PAYMENT_STATE)
+
+
+class TestCheckoutEngine(unittest.TestCase):
+
+    def test_batch_outcomes(self):
+        contexts = [
+            CheckoutContext(100, 10, 3),
+            CheckoutContext(10, 10, 3),
+            CheckoutContext(30, 10, 3),
+        ]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            outcomes = CheckoutEngine().run(contexts)
+
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(
+            outcomes,
+            [
+                CheckoutOutcome.CONFIRMED,
+                CheckoutOutcome.INSUFFICIENT_FUNDS,
+                CheckoutOutcome.CONFIRMED,
+            ],
+        )
+        self.assertEqual([c.user_info["balance"] for c in contexts], [70, 10, 0])
+        self.assertIsInstance(contexts[0].state, ConfirmationState)
+        self.assertIsInstance(contexts[1].state, CartState)
+
+    def test_resume_from_payment(self):
+        context = CheckoutContext(50, 5, 2)
+        context.set_state(PAYMENT_STATE)
+        self.assertEqual(CheckoutEngine().run([context]), [CheckoutOutcome.CONFIRMED])
+        self.assertEqual(context.user_info["balance"], 40)
+
+        # Already confirmed contexts are not charged again
+        self.assertEqual(CheckoutEngine().run([context]), [CheckoutOutcome.CONFIRMED])
+        self.assertEqual(context.user_info["balance"], 40)
+
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sessions.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_session_round_trip(self):
+        context = CheckoutContext(100, 9.99, 3)
+        context.set_state(PAYMENT_STATE)
+        session = CheckoutSession.from_context(context)
+
+        self.assertEqual(session, CheckoutSession(100, 9.99, 3, CheckoutStateCode.PAYMENT))
+        self.assertFalse(hasattr(session, "__dict__"))
+
+        restored = session.to_context()
+        self.assertIs(restored.state, PAYMENT_STATE)
+        self.assertEqual(restored.product_info, {"price": 9.99, "quantity": 3})
+
+    def test_snapshot_and_restore(self):
+        with SessionStore(self.path, capacity=2) as store:
+            context = CheckoutContext(100, 10, 3)
+            context.set_state(CONFIRMATION_STATE)
+            store.snapshot(0, context)
+            store.snapshot(7, CheckoutContext(50.5, 2.25, 4))
+            store.snapshot("cart-42", CheckoutContext(5, 1, 1))  # Grows the file
+
+            self.assertEqual(store.capacity, 4)
+            self.assertIn(7, store)
+            self.assertNotIn(3, store)
+            self.assertNotIn("7", store)
+            with self.assertRaises(KeyError):
+                store.restore(3)
+
+        # Sessions survive reopening the store
+        with SessionStore(self.path) as store:
+            restored = store.restore(0)
+            self.assertIs(restored.state, CONFIRMATION_STATE)
+            self.assertEqual(restored.user_info["balance"], 100)
+            self.assertIsInstance(restored.user_info["balance"], int)
+            self.assertEqual(store.load(7), CheckoutSession(50.5, 2.25, 4))
+
+            self.assertEqual(store.load("cart-42"), CheckoutSession(5, 1, 1))
+
+            store.delete(0)
+            self.assertNotIn(0, store)
+            self.assertEqual(len(store), 2)
+
+    def test_sparse_and_large_ids(self):
+        with SessionStore(self.path, capacity=2) as store:
+            store.save(10**9, CheckoutSession(1, 2, 3))
+            store.save(-5, CheckoutSession(4, 5, 6))
+            store.save(b"\x00raw", CheckoutSession(7, 8, 9))
+            # Records follow the number of sessions, not the largest id
+            self.assertEqual(store.capacity, 4)
+
+            # A deleted session's record is reused before the file grows
+            store.delete(-5)
+            store.save("next", CheckoutSession(1, 1, 1))
+            self.assertEqual(store.capacity, 4)
+
+            with self.assertRaises(TypeError):
+                store.save(1.5, CheckoutSession(1, 1, 1))
+            with self.assertRaises(ValueError):
+                store.save("x" * 33, CheckoutSession(1, 1, 1))
+            self.assertEqual(len(store), 3)
+
+        self.assertEqual(os.path.getsize(self.path), 4 * SessionStore.RECORD.size)
+        with SessionStore(self.path) as store:
+            self.assertEqual(store.load(10**9), CheckoutSession(1, 2, 3))
+            self.assertEqual(store.load(b"\x00raw"), CheckoutSession(7, 8, 9))
+            self.assertEqual(store.load("next"), CheckoutSession(1, 1, 1))
+            self.assertNotIn(-5, store)
+
+    def test_account_id_survives_restore(self):
+        context = CheckoutContext(100, 10, 3)
+        context.user_info["account_id"] = "acct-1"
+        with SessionStore(self.path) as store:
+            store.snapshot(1, context)
+            store.snapshot(2, CheckoutContext(100, 10, 3))
+        with SessionStore(self.path) as store:
+            self.assertEqual(store.restore(1).user_info, {"balance": 100, "account_id": "acct-1"})
+            self.assertEqual(store.restore(2).user_info, {"balance": 100})
+
+    def test_rejects_foreign_file(self):
+        with open(self.path, "wb") as target:
+            target.write(b"not a store")
+        with self.assertRaises(ValueError):
+            SessionStore(self.path)
+
+
+class TestConcurrentCheckout(unittest.TestCase):
+
+    def test_shared_balance_is_never_overdrawn(self):
+        accounts = [{"balance": 1000} for _ in range(4)]
+        checkout = ConcurrentCheckout(stripes=2)
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def worker(account):
+            results = []
+            for _ in range(50):
+                context = CheckoutContext(product_price=7, product_quantity=1)
+                context.user_info = account
+                results.append(checkout.checkout(context))
+            with outcomes_lock:
+                outcomes.extend(results)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=worker, args=(accounts[index % len(accounts)],))
+                for index in range(32)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        # 8 threads x 50 checkouts per account, but only 142 fit in 1000
+        confirmed = outcomes.count(CheckoutOutcome.CONFIRMED)
+        self.assertEqual(confirmed, 142 * len(accounts))
+        self.assertEqual(outcomes.count(CheckoutOutcome.INSUFFICIENT_FUNDS), 1600 - confirmed)
+        self.assertEqual([account["balance"] for account in accounts], [6] * len(accounts))
+
+    def test_confirmed_contexts_are_not_charged_again(self):
+        checkout = ConcurrentCheckout()
+        context = CheckoutContext(100, 10, 3)
+        self.assertEqual(checkout.checkout(context), CheckoutOutcome.CONFIRMED)
+        self.assertIs(context.state, CONFIRMATION_STATE)
+        self.assertEqual(checkout.checkout(context), CheckoutOutcome.CONFIRMED)
+        self.assertEqual(context.user_info["balance"], 70)
+
+
+class TestAsyncCheckout(unittest.TestCase):
+
+    def test_payments_overlap_up_to_limit(self):
+        gateway = FakePaymentGateway(latency=0.02)
+        checkout = AsyncCheckout(gateway, limit=10)
+        contexts = [CheckoutContext(100, 10, 3, sink=NullSink()) for _ in range(50)]
+        contexts.append(CheckoutContext(10, 10, 3, sink=NullSink()))
+
+        outcomes = asyncio.run(checkout.run(contexts))
+
+        self.assertEqual(outcomes[:50], [CheckoutOutcome.CONFIRMED] * 50)
+        self.assertEqual(outcomes[50], CheckoutOutcome.INSUFFICIENT_FUNDS)
+        self.assertEqual(gateway.max_in_flight, 10)
+        self.assertEqual(len(gateway.charges), 50)
+        self.assertEqual(contexts[0].user_info["balance"], 70)
+        self.assertIs(contexts[0].state, CONFIRMATION_STATE)
+
+    def test_declined_payment_restores_balance(self):
+        sink = RingBufferSink()
+        context = CheckoutContext(100, 10, 3, sink=sink)
+        checkout = AsyncCheckout(FakePaymentGateway(latency=0, approve=False))
+
+        outcome = asyncio.run(checkout.checkout(context))
+
+        self.assertEqual(outcome, CheckoutOutcome.PAYMENT_DECLINED)
+        self.assertEqual(context.user_info["balance"], 100)
+        self.assertIs(context.state, PAYMENT_STATE)
+        self.assertEqual(sink.events()[-1].name, "payment.declined")
+
+    def test_failed_charge_restores_balance(self):
+        class BrokenGateway(FakePaymentGateway):
+            async def charge(self, amount):
+                raise ConnectionError("gateway unreachable")
+
+        metrics = CheckoutMetrics()
+        context = CheckoutContext(100, 10, 3, sink=NullSink(), metrics=metrics)
+        checkout = AsyncCheckout(BrokenGateway())
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(checkout.checkout(context))
+
+        self.assertEqual(context.user_info["balance"], 100)
+        self.assertIs(context.state, PAYMENT_STATE)
+        self.assertEqual(metrics.snapshot()["rejections"], {"PaymentState": 1})
+
+    def test_shared_balance_is_reserved_before_waiting(self):
+        account = {"balance": 50}
+        contexts = []
+        for _ in range(3):
+            context = CheckoutContext(0, 20, 1, sink=NullSink())
+            context.user_info = account
+            contexts.append(context)
+
+        checkout = AsyncCheckout(FakePaymentGateway(latency=0.01))
+        outcomes = asyncio.run(checkout.run(contexts))
+
+        self.assertEqual(outcomes.count(CheckoutOutcome.CONFIRMED), 2)
+        self.assertEqual(outcomes.count(CheckoutOutcome.INSUFFICIENT_FUNDS), 1)
+        self.assertEqual(account["balance"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
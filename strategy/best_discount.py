@@ -0,0 +1,66 @@
+from collections import namedtuple
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from strategy.cart import Cart, MultiLineCart
+from strategy.discount_strategy import DiscountStrategy
+
+BestDiscount = namedtuple("BestDiscount", ["strategy", "price"])
+
+
+def _lines(carts: Sequence[Union[Cart, MultiLineCart]]):
+    """Flatten carts into line prices, quantities and the index of the owning cart."""
+    prices, quantities, counts = [], [], []
+    for cart in carts:
+        if isinstance(cart, MultiLineCart):
+            prices.append(cart.prices)
+            quantities.append(cart.quantities)
+            counts.append(len(cart))
+        else:
+            prices.append([cart.price_per_item])
+            quantities.append([cart.quantity])
+            counts.append(1)
+    if not carts:
+        return np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(carts)), counts)
+    return (
+        np.concatenate(prices).astype(float),
+        np.concatenate(quantities).astype(np.int64),
+        owners,
+    )
+
+
+def price_matrix(
+    carts: Sequence[Union[Cart, MultiLineCart]], strategies: Sequence[DiscountStrategy]
+) -> np.ndarray:
+    """
+    Price every cart under every strategy.
+
+    Each strategy prices the lines of all carts in a single vectorized call;
+    strategies without a vectorized form fall back to one call per line.
+    A cart's own strategy is ignored.
+
+    Returns:
+        An (M carts x N strategies) array of totals
+    """
+    prices, quantities, owners = _lines(carts)
+    matrix = np.empty((len(carts), len(strategies)))
+    for column, strategy in enumerate(strategies):
+        matrix[:, column] = strategy.apply_discount_carts(prices, quantities, owners, len(carts))
+    return matrix
+
+
+def best_discounts(
+    carts: Sequence[Union[Cart, MultiLineCart]], strategies: Sequence[DiscountStrategy]
+) -> List[BestDiscount]:
+    """Return the cheapest strategy and its price for each cart (first one wins ties)."""
+    if not strategies:
+        raise ValueError("At least one strategy is required")
+    matrix = price_matrix(carts, strategies)
+    best = matrix.argmin(axis=1)
+    prices = matrix[np.arange(len(carts)), best]
+    return [
+        BestDiscount(strategies[column], price)
+        for column, price in zip(best.tolist(), prices.tolist())
+    ]
@@ -1,13 +1,109 @@
+import asyncio
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
 from strategy.discount_strategy import DiscountStrategy
 
 # Context
 class Cart:
     def __init__(
-        self, price_per_item: float, quantity: int, strategy: DiscountStrategy
+        self,
+        price_per_item: float,
+        quantity: int,
+        strategy: DiscountStrategy,
+        memoize: bool = False,
     ):
         self.price_per_item = price_per_item
         self.quantity = quantity
         self.strategy = strategy
+        # Each strategy keeps its own cache, so swapping strategies never
+        # serves results computed by the previous one
+        self.memoize = memoize
 
     def checkout(self) -> float:
+        if self.memoize:
+            return self.strategy.apply_discount_cached(self.price_per_item, self.quantity)
         return self.strategy.apply_discount(self.price_per_item, self.quantity)
+
+    async def checkout_async(self) -> float:
+        return await self.strategy.apply_discount_async(self.price_per_item, self.quantity)
+
+
+async def checkout_concurrently(carts: Iterable[Cart], limit: int = 100) -> List[float]:
+    """
+    Check out many carts concurrently, with at most ``limit`` in flight.
+
+    Strategies waiting on I/O overlap with each other instead of running one
+    after another, and totals are returned in the order of ``carts``.
+    """
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    semaphore = asyncio.Semaphore(limit)
+
+    async def checkout(cart: Cart) -> float:
+        async with semaphore:
+            return await cart.checkout_async()
+
+    return list(await asyncio.gather(*(checkout(cart) for cart in carts)))
+
+
+# Context with many line items, stored as parallel arrays
+class MultiLineCart:
+    def __init__(
+        self,
+        prices: Sequence[float],
+        quantities: Sequence[int],
+        strategy: DiscountStrategy,
+        skus: Optional[Sequence[str]] = None,
+    ):
+        self.prices = np.asarray(prices, dtype=float)
+        self.quantities = np.asarray(quantities, dtype=np.int64)
+        if self.prices.shape != self.quantities.shape or self.prices.ndim != 1:
+            raise ValueError("Prices and quantities must be 1-D arrays of the same length")
+        self.skus = np.asarray(skus if skus is not None else [""] * len(self.prices), dtype=object)
+        if len(self.skus) != len(self.prices):
+            raise ValueError("There must be one SKU per line")
+        self.strategy = strategy
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[tuple], strategy: DiscountStrategy) -> "MultiLineCart":
+        """Build a cart from (sku, price, quantity) tuples."""
+        lines = list(lines)
+        skus = [sku for sku, _, _ in lines]
+        prices = [price for _, price, _ in lines]
+        quantities = [quantity for _, _, quantity in lines]
+        return cls(prices, quantities, strategy, skus)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def line_totals(self) -> np.ndarray:
+        """Total of every line, before any discount applied once per cart."""
+        return self.strategy.apply_discount_lines(self.prices, self.quantities)
+
+    def checkout(self) -> float:
+        owners = np.zeros(len(self.prices), dtype=np.int64)
+        return float(self.strategy.apply_discount_carts(self.prices, self.quantities, owners, 1)[0])
+
+
+def checkout_many(carts: Sequence[MultiLineCart]) -> List[float]:
+    """
+    Check out many carts at once.
+
+    Lines of all carts sharing a strategy are priced in one vectorized call
+    and summed back per cart before any cart-level discount, so the cost no
+    longer grows with the number of Python objects involved.
+    """
+    totals = np.zeros(len(carts))
+    by_strategy = {}
+    for index, cart in enumerate(carts):
+        by_strategy.setdefault(id(cart.strategy), (cart.strategy, []))[1].append(index)
+
+    for strategy, indices in by_strategy.values():
+        prices = np.concatenate([carts[index].prices for index in indices])
+        quantities = np.concatenate([carts[index].quantities for index in indices])
+        # Position of each line's cart within this strategy's carts
+        owners = np.repeat(np.arange(len(indices)), [len(carts[index]) for index in indices])
+        totals[indices] = strategy.apply_discount_carts(prices, quantities, owners, len(indices))
+    return totals.tolist()
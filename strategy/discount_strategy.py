@@ -1,10 +1,115 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize", "hit_rate"])
+
+
+# Bounded LRU store of discounted totals keyed by (price, quantity)
+class DiscountCache:
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def get_or_compute(self, strategy: "DiscountStrategy", price: float, quantity: int) -> float:
+        key = (price, quantity)
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = self._results[key] = strategy.apply_discount(price, quantity)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+            return result
+
+        self.hits += 1
+        self._results.move_to_end(key)
+        return result
+
+    def clear(self) -> None:
+        # Counters are kept so the hit rate covers the strategy's whole life
+        self._results.clear()
+
+    def info(self) -> CacheInfo:
+        calls = self.hits + self.misses
+        hit_rate = self.hits / calls if calls else 0.0
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results), hit_rate)
+
 
 # Strategy Interface
 class DiscountStrategy(ABC):
+    _cache = None
+
     @abstractmethod
     def apply_discount(self, price: float, quantity: int) -> float:
         pass
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Changing a parameter such as percent or amount invalidates memoized results
+        if self._cache is not None and not name.startswith("_"):
+            self._cache.clear()
+
+    def memoize(self, maxsize: int = 1024) -> "DiscountStrategy":
+        """Cache results per (price, quantity) in a bounded LRU cache."""
+        self._cache = DiscountCache(maxsize)
+        return self
 
+    def apply_discount_cached(self, price: float, quantity: int) -> float:
+        if self._cache is None:
+            self.memoize()
+        return self._cache.get_or_compute(self, price, quantity)
 
+    def cache_info(self) -> CacheInfo:
+        if self._cache is None:
+            return CacheInfo(0, 0, 0, 0, 0.0)
+        return self._cache.info()
+
+    def apply_discount_many(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        # Fallback for strategies without a vectorized form: one call per line
+        return np.fromiter(
+            (
+                self.apply_discount(price, quantity)
+                for price, quantity in zip(prices.tolist(), quantities.tolist())
+            ),
+            dtype=float,
+            count=len(prices),
+        )
+
+    def apply_discount_lines(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        # Part of the discount priced per line of a cart
+        return self.apply_discount_many(prices, quantities)
+
+    def apply_cart_discount(self, subtotals: np.ndarray) -> np.ndarray:
+        # Part of the discount applied once per cart, to the sum of its lines
+        return subtotals
+
+    def apply_discount_carts(
+        self, prices: np.ndarray, quantities: np.ndarray, owners: np.ndarray, count: int
+    ) -> np.ndarray:
+        """Total of each of ``count`` carts, given every line and the index of its cart."""
+        subtotals = np.bincount(
+            owners, weights=self.apply_discount_lines(prices, quantities), minlength=count
+        )
+        return self.apply_cart_discount(subtotals)
+
+    async def apply_discount_async(self, price: float, quantity: int) -> float:
+        # Synchronous strategies are awaited like async ones and run inline
+        return self.apply_discount(price, quantity)
+
+
+# Strategy Interface for discounts that need I/O, e.g. live promo budgets
+class AsyncDiscountStrategy(DiscountStrategy):
+    @abstractmethod
+    async def apply_discount_async(self, price: float, quantity: int) -> float:
+        pass
+
+    def apply_discount(self, price: float, quantity: int) -> float:
+        raise TypeError(
+            f"{type(self).__name__} is asynchronous, use apply_discount_async()"
+        )
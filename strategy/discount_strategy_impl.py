@@ -1,3 +1,5 @@
+import numpy as np
+
 from strategy.discount_strategy import DiscountStrategy
 
 
@@ -9,6 +11,9 @@ class PercentageDiscount(DiscountStrategy):
     def apply_discount(self, price: float, quantity: int) -> float:
         return price * quantity * ((100 - self.percent) / 100)
 
+    def apply_discount_many(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        return prices * quantities * ((100 - self.percent) / 100)
+
 
 # Concrete Strategy 2: Fixed Discount
 class FixedDiscount(DiscountStrategy):
@@ -19,9 +24,23 @@ class FixedDiscount(DiscountStrategy):
         total = (price * quantity) - self.amount
         return max(total, 0)
 
+    def apply_discount_many(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        return np.maximum(prices * quantities - self.amount, 0)
+
+    def apply_discount_lines(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        # The amount comes off a cart's total, not off each of its lines
+        return prices * quantities
+
+    def apply_cart_discount(self, subtotals: np.ndarray) -> np.ndarray:
+        return np.maximum(subtotals - self.amount, 0)
+
 
 # Concrete Strategy 3: Buy-One-Get-One Free
 class BOGODiscount(DiscountStrategy):
     def apply_discount(self, price: float, quantity: int) -> float:
         paid_items = (quantity // 2) + (quantity % 2)
         return paid_items * price
+
+    def apply_discount_many(self, prices: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        paid_items = (quantities // 2) + (quantities % 2)
+        return paid_items * prices
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 
 from .discount_strategy_impl import (
@@ -5,7 +6,9 @@ from .discount_strategy_impl import (
     FixedDiscount,
     BOGODiscount,
 )
-from strategy.cart import Cart
+from strategy.best_discount import best_discounts, price_matrix
+from strategy.cart import Cart, MultiLineCart, checkout_concurrently, checkout_many
+from strategy.discount_strategy import AsyncDiscountStrategy, DiscountStrategy
 
 
 class TestDiscountStrategies(unittest.TestCase):
@@ -82,6 +85,155 @@ class TestDiscountStrategies(unittest.TestCase):
         self.assertEqual(Cart(100, 0, FixedDiscount(100)).checkout(), 0)
         self.assertEqual(Cart(100, 0, BOGODiscount()).checkout(), 0)
 
+    def test_multi_line_cart_matches_single_line_carts(self):
+        lines = [("A", 100, 2), ("B", 25.5, 3), ("C", 10, 0), ("D", 40, 5)]
+        for strategy in (PercentageDiscount(10), BOGODiscount()):
+            cart = MultiLineCart.from_lines(lines, strategy)
+            expected = sum(Cart(price, quantity, strategy).checkout() for _, price, quantity in lines)
+            self.assertAlmostEqual(cart.checkout(), expected)
+            self.assertEqual(list(cart.skus), ["A", "B", "C", "D"])
+
+    def test_fixed_discount_applies_once_per_cart(self):
+        lines = [("A", 100, 2), ("B", 25.5, 3), ("C", 10, 0), ("D", 40, 5)]
+        cart = MultiLineCart.from_lines(lines, FixedDiscount(60))
+        self.assertAlmostEqual(cart.checkout(), 200 + 76.5 + 200 - 60)
+        self.assertEqual(cart.line_totals().tolist(), [200, 76.5, 0, 200])
+
+        # Lines below the amount still count toward the cart's total
+        cart = MultiLineCart([10, 20, 30], [1, 1, 1], FixedDiscount(50))
+        self.assertEqual(cart.checkout(), 10)
+        cart.strategy = FixedDiscount(100)
+        self.assertEqual(cart.checkout(), 0)
+        self.assertEqual(MultiLineCart([], [], FixedDiscount(50)).checkout(), 0)
+
+    def test_multi_line_cart_validation(self):
+        with self.assertRaises(ValueError):
+            MultiLineCart([100, 200], [1], BOGODiscount())
+        with self.assertRaises(ValueError):
+            MultiLineCart([100], [1], BOGODiscount(), skus=["A", "B"])
+
+    def test_checkout_many(self):
+        percentage, fixed = PercentageDiscount(10), FixedDiscount(50)
+        carts = [
+            MultiLineCart([100, 50], [2, 1], percentage),
+            MultiLineCart([100], [3], FixedDiscount(50)),
+            MultiLineCart([], [], BOGODiscount()),
+            MultiLineCart([10, 20], [3, 4], percentage),
+            MultiLineCart([10, 20, 30], [1, 1, 1], fixed),
+            MultiLineCart([40, 5], [1, 2], fixed),
+        ]
+        self.assertEqual(checkout_many(carts), [cart.checkout() for cart in carts])
+        self.assertEqual(checkout_many(carts)[-2:], [10, 0])
+        self.assertEqual(checkout_many([]), [])
+
+    def test_price_matrix_matches_apply_discount(self):
+        class FlatFeeDiscount(DiscountStrategy):
+            # Custom strategy without a vectorized form
+            def apply_discount(self, price, quantity):
+                return price * quantity + 5
+
+        strategies = [PercentageDiscount(10), FixedDiscount(50), BOGODiscount(), FlatFeeDiscount()]
+        carts = [Cart(100, 3, None), Cart(20, 1, None), MultiLineCart([100, 10], [2, 4], None)]
+
+        matrix = price_matrix(carts, strategies)
+
+        self.assertEqual(matrix.shape, (3, 4))
+        for column, strategy in enumerate(strategies):
+            self.assertAlmostEqual(matrix[0, column], strategy.apply_discount(100, 3))
+            self.assertAlmostEqual(matrix[1, column], strategy.apply_discount(20, 1))
+        for column, strategy in enumerate(strategies[2:], 2):
+            self.assertAlmostEqual(
+                matrix[2, column],
+                strategy.apply_discount(100, 2) + strategy.apply_discount(10, 4),
+            )
+        # A fixed discount comes off the multi-line cart's total once
+        self.assertAlmostEqual(matrix[2, 0], 240 * 0.9)
+        self.assertAlmostEqual(matrix[2, 1], 240 - 50)
+
+    def test_best_discounts(self):
+        percentage, fixed, bogo = PercentageDiscount(10), FixedDiscount(50), BOGODiscount()
+        carts = [Cart(100, 3, None), Cart(100, 1, None), Cart(1000, 1, None)]
+
+        best = best_discounts(carts, [percentage, fixed, bogo])
+
+        self.assertEqual([choice.strategy for choice in best], [bogo, fixed, percentage])
+        self.assertEqual([choice.price for choice in best], [200, 50, 900])
+        self.assertEqual(best_discounts([], [bogo]), [])
+        with self.assertRaises(ValueError):
+            best_discounts(carts, [])
+
+    def test_memoized_checkout(self):
+        percentage = PercentageDiscount(10).memoize(maxsize=2)
+        cart = Cart(100, 2, percentage, memoize=True)
+
+        self.assertEqual(cart.checkout(), 180)
+        self.assertEqual(cart.checkout(), 180)
+        self.assertEqual(percentage.cache_info()[:4], (1, 1, 2, 1))
+        self.assertEqual(percentage.cache_info().hit_rate, 0.5)
+
+        # Changing a strategy parameter invalidates its cache
+        percentage.percent = 50
+        self.assertEqual(cart.checkout(), 100)
+        self.assertEqual(percentage.cache_info().misses, 2)
+
+        # Swapping the cart's strategy uses the new strategy's own cache
+        cart.strategy = FixedDiscount(30)
+        self.assertEqual(cart.checkout(), 170)
+        cart.strategy.amount = 50
+        self.assertEqual(cart.checkout(), 150)
+        cart.strategy = percentage
+        self.assertEqual(cart.checkout(), 100)
+        self.assertEqual(percentage.cache_info().hits, 2)
+
+        # The cache is bounded
+        for quantity in range(5):
+            cart.quantity = quantity
+            cart.checkout()
+        self.assertEqual(percentage.cache_info().currsize, 2)
+
+
+class BudgetedDiscount(AsyncDiscountStrategy):
+    """Async strategy that waits on a simulated promo budget lookup."""
+
+    def __init__(self, percent, delay=0.01):
+        self.percent = percent
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def apply_discount_async(self, price, quantity):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return price * quantity * ((100 - self.percent) / 100)
+
+
+class TestAsyncCheckout(unittest.TestCase):
+
+    def test_sync_and_async_strategies(self):
+        cart = Cart(100, 2, PercentageDiscount(10))
+        self.assertEqual(asyncio.run(cart.checkout_async()), 180)
+
+        cart.strategy = BudgetedDiscount(20, delay=0)
+        self.assertEqual(asyncio.run(cart.checkout_async()), 160)
+
+        with self.assertRaises(TypeError):
+            cart.checkout()
+
+    def test_checkout_concurrently(self):
+        strategy = BudgetedDiscount(50)
+        carts = [Cart(price, 1, strategy) for price in range(20)]
+        carts.append(Cart(100, 3, BOGODiscount()))
+
+        totals = asyncio.run(checkout_concurrently(carts, limit=5))
+
+        self.assertEqual(totals, [price / 2 for price in range(20)] + [200])
+        self.assertEqual(strategy.max_in_flight, 5)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(checkout_concurrently(carts, limit=0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,103 @@
+import io
+import json
+import unittest
+
+from decorators.price_calculator.prices import BasePrice
+from decorators.price_calculator.price_calculator_decorator_impl import SeasonalDiscount, TaxCalculator
+from reprice import RowWriter, read_rows, reprice_parallel, reprice_stream
+
+
+class TestReprice(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = TaxCalculator(SeasonalDiscount(BasePrice()), tax_rate=10)
+
+    def test_csv_stream_with_rejects(self):
+        source = io.StringIO("sku,price\nA,100\nB,-5\nC,abc\nD,50\n")
+        target, rejects = io.StringIO(), io.StringIO()
+
+        priced, rejected, _ = reprice_stream(
+            self.chain,
+            read_rows(source, "csv"),
+            RowWriter(target, "csv"),
+            RowWriter(rejects, "csv"),
+            chunk_size=2,
+        )
+
+        self.assertEqual((priced, rejected), (2, 2))
+        self.assertEqual(
+            target.getvalue().splitlines(),
+            ["sku,price,final_price", "A,100,99.0", "D,50,49.5"],
+        )
+        self.assertEqual(
+            rejects.getvalue().splitlines(),
+            [
+                "sku,price,error",
+                "B,-5,Price cannot be negative",
+                "C,abc,Invalid price: 'abc'",
+            ],
+        )
+
+    def test_jsonl_stream(self):
+        source = io.StringIO('{"sku": "A", "price": 20}\n\n{"sku": "B", "price": 40}\n')
+        target, rejects = io.StringIO(), io.StringIO()
+
+        priced, rejected, _ = reprice_stream(
+            self.chain,
+            read_rows(source, "jsonl"),
+            RowWriter(target, "jsonl"),
+            RowWriter(rejects, "jsonl"),
+        )
+
+        self.assertEqual((priced, rejected), (2, 0))
+        rows = [json.loads(line) for line in target.getvalue().splitlines()]
+        self.assertEqual([row["final_price"] for row in rows], [19.8, 39.6])
+        self.assertEqual(rejects.getvalue(), "")
+
+    def test_malformed_jsonl_lines_are_rejected(self):
+        source = io.StringIO('{"sku": "A", "price": 20}\n{"sku": "B", "pri\n[1, 2]\n{"sku": "C", "price": 40}\n')
+        target, rejects = io.StringIO(), io.StringIO()
+
+        priced, rejected, _ = reprice_stream(
+            self.chain,
+            read_rows(source, "jsonl"),
+            RowWriter(target, "jsonl"),
+            RowWriter(rejects, "jsonl"),
+        )
+
+        self.assertEqual((priced, rejected), (2, 2))
+        rows = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        self.assertEqual([row["raw"] for row in rows], ['{"sku": "B", "pri', "[1, 2]"])
+        self.assertTrue(rows[0]["error"].startswith("Invalid JSON"))
+        self.assertEqual(rows[1]["error"], "Row is not a JSON object")
+
+    def test_parallel_matches_serial(self):
+        lines = ["sku,price\n"] + [f"S{i},{i - 5}\n" for i in range(50)]
+        formats = ("csv", "csv", "csv")
+
+        serial, serial_rejects = io.StringIO(), io.StringIO()
+        reprice_stream(
+            self.chain,
+            read_rows(io.StringIO("".join(lines)), "csv"),
+            RowWriter(serial, "csv"),
+            RowWriter(serial_rejects, "csv"),
+        )
+
+        parallel, parallel_rejects = io.StringIO(), io.StringIO()
+        priced, rejected, _ = reprice_parallel(
+            self.chain,
+            io.StringIO("".join(lines)),
+            formats,
+            RowWriter(parallel, "csv"),
+            RowWriter(parallel_rejects, "csv"),
+            workers=2,
+            chunk_size=7,
+        )
+
+        self.assertEqual((priced, rejected), (45, 5))
+        self.assertEqual(parallel.getvalue(), serial.getvalue())
+        self.assertEqual(parallel_rejects.getvalue(), serial_rejects.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()